@@ -0,0 +1,91 @@
+import os
+import json
+import hashlib
+import threading
+
+from engine import CACHE_FOLDER
+
+# Inhaltsadressierter Cache für Zwischenergebnisse der Pipeline. Der Schlüssel ist ein Hash über
+# alle Eingaben eines Schritts (Story: Prompt + Modell, Audio: Text + Stimme + Tempo, Timings:
+# Audio-Hash + Quelle + Modell). Ein neuer Look für dieselbe Story kostet so nur noch das Rendern.
+# Begrenzt auf max_mb, geräumt werden die am längsten nicht benutzten Dateien (mtime).
+ARTIFACT_FOLDER = os.path.join(CACHE_FOLDER, "artifacts")
+
+def artifact_key(kind, *parts):
+    payload = json.dumps([kind, *parts], sort_keys=True, ensure_ascii=False, default=str)
+    return f"{kind}-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:40]
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class ArtifactCache:
+    def __init__(self, folder=ARTIFACT_FOLDER, max_mb=2048, log=print):
+        self.folder = folder
+        self.max_bytes = max_mb * 1024 * 1024
+        self.log = log
+        self.lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self.bytes = sum(os.path.getsize(p) for p in self._files())
+
+    def _files(self):
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                if not name.endswith(".tmp"): yield os.path.join(root, name)
+
+    def path(self, key, ext):
+        return os.path.join(self.folder, key[-2:], key + ext)
+
+    def get(self, key, ext):
+        # Pfad bei Treffer (und als benutzt markieren), sonst None
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+            return path
+        except OSError:
+            return None
+
+    def put_file(self, key, ext, src):
+        # Verschiebt src in den Cache und gibt den neuen Pfad zurück
+        path = self.path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        old = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(src, path)
+        with self.lock:
+            self.bytes += os.path.getsize(path) - old
+        self.evict()
+        return path
+
+    def get_json(self, key):
+        path = self.get(key, ".json")
+        if not path: return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put_json(self, key, data):
+        tmp = os.path.join(self.folder, f"{key}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        return self.put_file(key, ".json", tmp)
+
+    def evict(self):
+        with self.lock:
+            if self.bytes <= self.max_bytes: return
+            files = sorted(self._files(), key=os.path.getmtime)
+            removed = 0
+            for path in files:
+                if self.bytes <= self.max_bytes: break
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    continue
+                self.bytes -= size
+                removed += 1
+            self.log(f"🧹 Artefakt-Cache: {removed} alte Dateien entfernt ({round(self.bytes / 1024 / 1024)} MB)")
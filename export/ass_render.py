@@ -0,0 +1,124 @@
+import os
+import uuid
+import subprocess
+
+from backgrounds import FFMPEG, run_ffprobe
+from subtitles import BOX_OPACITY, BOX_PAD, load_truetype
+
+# Natives Render-Backend: Whisper-Wörter + Typo-Settings -> ASS-Skript, dann ein einziger
+# ffmpeg-Filtergraph (Loop/Trim, Scale, Abdunkeln, ass, atempo). Kein Frame geht durch Python.
+
+# Pop-In wie ZOOM_EASINGS in subtitles.py, als libass-Transformationen
+ZOOM_TAGS = {
+    'linear': r"\fscx80\fscy80\t(0,100,\fscx95\fscy95)\t(100,100,\fscx100\fscy100)",
+    'ease_out': r"\fscx80\fscy80\t(0,100,0.5,\fscx100\fscy100)",
+    'back': r"\fscx80\fscy80\t(0,70,\fscx105\fscy105)\t(70,100,\fscx100\fscy100)",
+}
+
+def media_duration(path):
+    try:
+        return float(run_ffprobe(["-show_entries", "format=duration", "-of", "csv=p=0", path]).strip())
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+        return ffmpeg_parse_infos(path)['duration']
+
+def ass_time(t):
+    cs = int(round(max(t, 0) * 100))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+def ass_color(hex_color, alpha=0):
+    # '#RRGGBB' -> '&HAABBGGRR'
+    r, g, b = hex_color[1:3], hex_color[3:5], hex_color[5:7]
+    return f"&H{alpha:02X}{b}{g}{r}".upper()
+
+def ass_escape(text):
+    return text.replace("\\", "").replace("{", "(").replace("}", ")")
+
+def ass_position(pos_y, size):
+    # Gleiche Bedeutung wie layout_y(): 'center' oder oberer Rand bei pos_y * Höhe
+    w, h = size
+    if pos_y == 'center': return rf"\an5\pos({w // 2},{h // 2})"
+    y = int(pos_y * h) if pos_y <= 1 else int(pos_y)
+    return rf"\an8\pos({w // 2},{y})"
+
+def ass_font_size(font, size):
+    # libass versteht Fontsize als Ascent + Descent, Pillow als Em-Größe -> umrechnen, sonst ist
+    # der Text hier ~15-20% kleiner als beim moviepy-Backend
+    pil_font = load_truetype(font, int(size))
+    if pil_font is None: return size
+    ascent, descent = pil_font.getmetrics()
+    return ascent + descent
+
+def build_ass(words, config, size):
+    w, h = size
+    f_size = ass_font_size(config['font'], config['f_size'])
+    # Box wie add_box(): BOX_PAD (gesamt) um das Wort inkl. Rand, getrennt für x/y per \xbord/\ybord
+    stroke = round(config['stroke'], 1)
+    box_bord = rf"\xbord{stroke + BOX_PAD[0] / 2:g}\ybord{stroke + BOX_PAD[1] / 2:g}"
+    box_alpha = int(round((1 - BOX_OPACITY) * 255))
+    lines = [
+        "[Script Info]", "ScriptType: v4.00+", f"PlayResX: {w}", f"PlayResY: {h}", "ScaledBorderAndShadow: yes", "WrapStyle: 2", "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, "
+        "ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Word,{config['font']},{f_size},&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,{stroke},0,5,0,0,0,1",
+        # Box: unsichtbarer Text, BorderStyle 3 zeichnet das Rechteck in OutlineColour
+        f"Style: Box,{config['font']},{f_size},&HFF000000,&HFF000000,&H{box_alpha:02X}000000,&H{box_alpha:02X}000000,0,0,0,0,100,100,0,0,3,0,0,5,0,0,0,1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    pos = ass_position(config['pos_y'], size)
+    zoom = ZOOM_TAGS[config['zoom_ease']] if config['zoom'] else ""
+    for word in words:
+        start, end, text = ass_time(word['start']), ass_time(word['end']), ass_escape(word['text'])
+        if config['bg_box']:
+            lines.append(f"Dialogue: 0,{start},{end},Box,,0,0,0,,{{{pos}{box_bord}{zoom}}}{text}")
+        lines.append(f"Dialogue: 1,{start},{end},Word,,0,0,0,,{{{pos}{zoom}\\c{ass_color(word['color'])}}}{text}")
+    return "\n".join(lines) + "\n"
+
+def filter_path(path):
+    # Pfade im Filtergraph: Backslashes/Doppelpunkte (Windows) escapen
+    return "'" + path.replace("\\", "/").replace(":", "\\:").replace("'", "\\'") + "'"
+
+def atempo_chain(speed):
+    # Tonhöhe bleibt erhalten; ältere ffmpeg-Versionen erlauben pro atempo nur 0.5..2.0
+    parts = []
+    while speed > 2.0:
+        parts.append("atempo=2.0"); speed /= 2.0
+    while speed < 0.5:
+        parts.append("atempo=0.5"); speed /= 0.5
+    parts.append(f"atempo={speed:.4f}")
+    return ",".join(parts)
+
+def render_ass_video(config, words, audio_path, duration, bg_path, bg_start, size, darken, out_name, fps=24, speed=1.0, scale=1.0):
+    from fonts import find_font_file
+    w, h = size[0] // 2 * 2, size[1] // 2 * 2
+    # Ausgabegröße; das ASS-Skript bleibt bei w x h und wird von libass mitskaliert
+    ow, oh = int(w * scale) // 2 * 2, int(h * scale) // 2 * 2
+    ass_file = f"temp_{uuid.uuid4().hex[:8]}.ass"
+    with open(ass_file, "w", encoding="utf-8") as f:
+        f.write(build_ass(words, config, (w, h)))
+
+    vf = [f"scale={ow}:{oh}", f"fps={fps}"]
+    if darken > 0:
+        k = round(1 - darken, 3)
+        vf.append(f"colorchannelmixer=rr={k}:gg={k}:bb={k}")
+    font_file = find_font_file(config['font'])
+    vf.append(f"ass={filter_path(ass_file)}" + (f":fontsdir={filter_path(os.path.dirname(font_file))}" if font_file else ""))
+
+    # Audio nur anfassen, wenn das Tempo nicht schon bei der TTS gesetzt wurde
+    graph, audio_map = f"[0:v]{','.join(vf)}[v]", "1:a"
+    if speed != 1.0:
+        graph, audio_map = graph + f";[1:a]{atempo_chain(speed)}[a]", "[a]"
+
+    cmd = [FFMPEG, "-v", "error", "-y",
+           "-stream_loop", "-1", "-ss", f"{bg_start:.3f}", "-i", bg_path, "-i", audio_path,
+           "-filter_complex", graph, "-map", "[v]", "-map", audio_map, "-t", f"{duration:.3f}",
+           "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-threads", "4", "-c:a", "aac", out_name]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg: {e.stderr.strip()[-500:]}") from None
+    finally:
+        if os.path.exists(ass_file): os.remove(ass_file)
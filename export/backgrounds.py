@@ -0,0 +1,155 @@
+import os
+import json
+import random
+import threading
+import subprocess
+
+from engine import CACHE_FOLDER
+
+# Persistenter Index der Hintergrund-Videos (Dauer, fps, Auflösung, Codec, Keyframes).
+# Neu geprobt wird nur, wenn sich mtime/Größe einer Datei ändern - die Auswahl beim
+# Rendern selbst kostet keinen ffmpeg-Aufruf.
+INDEX_FILE = os.path.join(CACHE_FOLDER, "background_index.json")
+VIDEO_EXTENSIONS = ('.mp4', '.mov')
+FFMPEG = "ffmpeg"
+
+def run_ffprobe(args):
+    out = subprocess.run(["ffprobe", "-v", "error"] + args, capture_output=True, text=True, check=True)
+    return out.stdout
+
+def probe_video(path):
+    try:
+        info = json.loads(run_ffprobe(["-select_streams", "v:0", "-show_entries", "stream=codec_name,width,height,avg_frame_rate:format=duration", "-of", "json", path]))
+        stream = info['streams'][0]
+        num, _, den = stream.get('avg_frame_rate', "0/1").partition("/")
+        # Nur Pakete lesen (kein Dekodieren), Keyframes haben das Flag 'K'
+        packets = run_ffprobe(["-select_streams", "v:0", "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path])
+        keyframes = sorted(float(p.split(",")[0]) for p in packets.splitlines() if "K" in p.partition(",")[2] and p.split(",")[0] not in ("", "N/A"))
+        return {
+            'duration': float(info['format']['duration']), 'fps': float(num) / float(den or 1),
+            'width': stream['width'], 'height': stream['height'], 'codec': stream['codec_name'], 'keyframes': keyframes,
+        }
+    except (OSError, subprocess.CalledProcessError):
+        # Ohne ffprobe: moviepy-Parser (ffmpeg -i), dann eben ohne Keyframes
+        from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+        info = ffmpeg_parse_infos(path)
+        return {
+            'duration': info['duration'], 'fps': info['video_fps'], 'width': info['video_size'][0],
+            'height': info['video_size'][1], 'codec': None, 'keyframes': [],
+        }
+
+class BackgroundLibrary:
+    def __init__(self, folder, index_file=INDEX_FILE, log=print):
+        self.folder = folder
+        self.index_file = index_file
+        self.log = log
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, encoding="utf-8") as f:
+                return json.load(f).get(os.path.abspath(self.folder), {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            with open(self.index_file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data[os.path.abspath(self.folder)] = self.entries
+        os.makedirs(os.path.dirname(self.index_file) or ".", exist_ok=True)
+        tmp = f"{self.index_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.index_file)
+
+    def refresh(self):
+        # Inkrementell: nur stat() pro Datei, ffprobe nur für neue oder geänderte Videos
+        with self.lock:
+            changed = False
+            names = [f for f in os.listdir(self.folder) if f.lower().endswith(VIDEO_EXTENSIONS)]
+            for name in names:
+                st = os.stat(os.path.join(self.folder, name))
+                entry = self.entries.get(name)
+                if entry and entry['mtime'] == st.st_mtime and entry['size'] == st.st_size: continue
+                self.log(f"📼 Indexiere {name}...")
+                try:
+                    entry = probe_video(os.path.join(self.folder, name))
+                except Exception as e:
+                    self.log(f"❌ Fehler bei {name}: {e}")
+                    continue
+                entry.update(mtime=st.st_mtime, size=st.st_size)
+                self.entries[name] = entry
+                changed = True
+            for name in set(self.entries) - set(names):
+                del self.entries[name]
+                changed = True
+            if changed: self._save()
+            return dict(self.entries)
+
+    def pick(self, duration):
+        # Zufällige Datei + zufälliger Keyframe-Start, ab dem noch 'duration' Sekunden Material
+        # übrig sind. Zu kurze Videos starten bei 0 und werden geloopt.
+        entries = self.refresh()
+        if not entries:
+            raise FileNotFoundError(f"Keine Hintergrund-Videos in '{self.folder}'")
+        name = random.choice(sorted(entries))
+        entry = entries[name]
+        latest = entry['duration'] - duration
+        starts = [k for k in entry['keyframes'] if k <= latest] or ([0.0] if latest < 0 else [])
+        start = random.choice(starts) if starts else random.uniform(0, latest)
+        return os.path.join(self.folder, name), start, entry
+
+# --- PROXIES: einmal auf 9:16 / 24 fps / kurze GOP normalisiert, optional schon abgedunkelt ---
+def proxy_subfolder(proxy_folder, darken):
+    # d00 = nur normalisiert, d40 = zusätzlich 40% abgedunkelt
+    return os.path.join(proxy_folder, f"d{int(round(darken * 100)):02d}")
+
+def make_proxy(src, dst, size=(1080, 1920), fps=24, darken=0.0):
+    w, h = size
+    # Auf Zielgröße füllen und mittig croppen (Querformat -> Hochformat)
+    filters = [f"scale={w}:{h}:force_original_aspect_ratio=increase", f"crop={w}:{h}", f"fps={fps}"]
+    if darken > 0:
+        f = round(1 - darken, 3)
+        filters.append(f"colorchannelmixer=rr={f}:gg={f}:bb={f}")
+    tmp = dst + ".part.mp4"
+    subprocess.run([FFMPEG, "-v", "error", "-y", "-i", src, "-an", "-vf", ",".join(filters),
+                    "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p",
+                    "-g", str(fps), "-keyint_min", str(fps), "-sc_threshold", "0", "-movflags", "+faststart", tmp], check=True)
+    os.replace(tmp, dst)
+
+def ingest(folder, proxy_folder, size=(1080, 1920), fps=24, darken_levels=(), log=print):
+    # Baut fehlende oder veraltete Proxies; gibt die Anzahl neu erzeugter Dateien zurück
+    built = 0
+    names = sorted(f for f in os.listdir(folder) if f.lower().endswith(VIDEO_EXTENSIONS))
+    for darken in sorted({0.0, *darken_levels}):
+        target = proxy_subfolder(proxy_folder, darken)
+        os.makedirs(target, exist_ok=True)
+        for name in names:
+            src = os.path.join(folder, name)
+            dst = os.path.join(target, os.path.splitext(name)[0] + ".mp4")
+            if os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src): continue
+            log(f"🎞️ Proxy {os.path.basename(target)}/{name} ({size[0]}x{size[1]}, {fps} fps)...")
+            try:
+                make_proxy(src, dst, size, fps, darken)
+                built += 1
+            except (OSError, subprocess.CalledProcessError) as e:
+                log(f"❌ Fehler bei {name}: {e}")
+        # Proxies ohne Quelle entfernen
+        expected = {os.path.splitext(n)[0] + ".mp4" for n in names}
+        for name in os.listdir(target):
+            if name.endswith(".mp4") and name not in expected:
+                os.remove(os.path.join(target, name))
+    return built
+
+def pick_source(config, video_folder):
+    # (Ordner, noch anzuwendendes Abdunkeln): vorab abgedunkelte Proxies > normale Proxies > Originale
+    if config['proxies']:
+        for folder, darken_left in ((proxy_subfolder(config['proxy_folder'], config['darken']), 0.0),
+                                    (proxy_subfolder(config['proxy_folder'], 0.0), config['darken'])):
+            if os.path.isdir(folder) and any(f.endswith(".mp4") for f in os.listdir(folder)):
+                return folder, darken_left
+    return video_folder, config['darken']
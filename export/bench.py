@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import asyncio
+import platform
+import itertools
+import subprocess
+from contextlib import contextmanager
+
+# Offline-Benchmark der kompletten Pipeline: synthetisches Hintergrund-Video, lokale Stand-ins für
+# ollama und edge_tts (deterministisch, ohne Netz) und dieselben Messpunkte wie im Betrieb
+# (metrics.stage). Jeder Fall = ein Video über run_topics; Ergebnis als JSON zum Vergleichen
+# zwischen Versionen, z.B.:
+#   python -m cli bench --words 50 150 --backends moviepy ffmpeg --out bench_results
+#   python -m cli bench --compare bench_results/alt.json
+# Soak-Test für den Dauerbetrieb: hunderte kurze Jobs mit demselben Generator, danach dürfen
+# RSS, offene Dateien, Kindprozesse und Threads nicht gewachsen sein:
+#   python -m cli soak --jobs 300
+
+BENCH_FOLDER = "bench_work"
+RESULTS_FOLDER = "bench_results"
+# Sprechdauer pro Wort im Stand-in (bei speed 1.0), entspricht ~150 Wörtern pro Minute
+WORD_SECONDS = 0.4
+# edge-tts: 24 kHz / 48 kbit/s Mono-MP3 -> 144 Bytes pro Frame, 24 ms pro Frame
+MP3_FRAME_BYTES = 144
+MP3_FRAME_SECONDS = 0.024
+VOCABULARY = ("ich", "du", "er", "sie", "wir", "nacht", "haus", "plötzlich", "dunkel", "tür", "schrei", "nachbar",
+              "keller", "handy", "nachricht", "mutter", "freund", "angst", "lachen", "geheimnis", "wald", "stimme",
+              "niemand", "wusste", "warum", "morgen", "wieder", "fenster", "licht", "schatten", "kalt", "leise")
+
+def run_ffmpeg(args):
+    from backgrounds import FFMPEG
+    subprocess.run([FFMPEG, "-v", "error", "-y"] + args, check=True, capture_output=True)
+
+def make_video(path, seconds=60, size=(1080, 1920), fps=24):
+    # Bewegtes Testbild (libx264, GOP = 1s) als Hintergrund-Footage
+    run_ffmpeg(["-f", "lavfi", "-i", f"testsrc2=size={size[0]}x{size[1]}:rate={fps}:duration={seconds}",
+                "-c:v", "libx264", "-preset", "ultrafast", "-g", str(fps), "-pix_fmt", "yuv420p", path])
+
+def make_mp3(path, seconds):
+    # Roh-MP3 im edge-tts-Format (kein ID3/Xing-Header), damit Frames einzeln aneinanderhängbar sind
+    run_ffmpeg(["-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}", "-ar", "24000", "-ac", "1", "-b:a", "48k",
+                "-write_xing", "0", "-id3v2_version", "0", "-f", "mp3", path])
+    return path
+
+def make_mp3_frames(path, seconds=2.0):
+    make_mp3(path, seconds)
+    with open(path, "rb") as f:
+        data = f.read()
+    return [data[i:i + MP3_FRAME_BYTES] for i in range(0, len(data) - MP3_FRAME_BYTES + 1, MP3_FRAME_BYTES)]
+
+def synthetic_story(words, seed=0):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(int(words)))
+
+def synthetic_timings(words, seed=0, word_seconds=WORD_SECONDS):
+    # Whisper-Struktur wie timings.from_boundaries
+    text = synthetic_story(words, seed).split()
+    return {'segments': [{'words': [{'word': w, 'start': i * word_seconds, 'end': (i + 0.85) * word_seconds} for i, w in enumerate(text)]}]}
+
+# --- STAND-INS ---
+class FakeOllamaClient:
+    # Antwortet sofort mit einer Story in der angefragten Länge ("Ungefähr N Wörter" aus dem Prompt)
+    def __init__(self, host=None, timeout=None):
+        pass
+
+    def generate(self, model, prompt="", **kwargs):
+        return {'response': ""}
+
+    def chat(self, model, messages, options=None, keep_alive=None, stream=False):
+        import re
+        prompt = messages[-1]['content']
+        found = re.search(r"Ungefähr (\d+) Wörter", prompt)
+        if found:
+            text = synthetic_story(int(found.group(1)), zlib.crc32(prompt.encode("utf-8")))
+        else:
+            text = "\n".join(f"Benchmark Thema {zlib.crc32(prompt.encode('utf-8')) % 1000} Nummer {i}" for i in range(5))
+        if stream:
+            return iter([{'message': {'content': text[i:i + 6]}} for i in range(0, len(text), 6)])
+        return {'message': {'content': text}}
+
+class FakeResponseError(Exception):
+    pass
+
+class FakeCommunicate:
+    # Liefert MP3-Frames + WordBoundary-Events wie edge_tts.Communicate(...).stream()
+    frames = []
+
+    def __init__(self, text, voice, rate="+0%", boundary=None, **kwargs):
+        self.text = text
+        self.speed = 1 + int(rate.rstrip("%")) / 100
+
+    async def stream(self):
+        t = 0.0
+        for i, word in enumerate(self.text.split()):
+            duration = WORD_SECONDS / self.speed
+            n = max(1, int(round(duration / MP3_FRAME_SECONDS)))
+            yield {"type": "WordBoundary", "offset": int(t * 1e7), "duration": int(duration * 0.85 * 1e7), "text": word}
+            yield {"type": "audio", "data": b"".join(self.frames[(i * n + k) % len(self.frames)] for k in range(n))}
+            t += n * MP3_FRAME_SECONDS
+            await asyncio.sleep(0)
+
+@contextmanager
+def stand_ins(frames):
+    # Ersetzt ollama und edge_tts in sys.modules, danach wird der alte Zustand wiederhergestellt
+    import types
+    FakeCommunicate.frames = frames
+    fakes = {'ollama': types.SimpleNamespace(Client=FakeOllamaClient, ResponseError=FakeResponseError),
+             'edge_tts': types.SimpleNamespace(Communicate=FakeCommunicate)}
+    saved = {name: sys.modules.get(name) for name in fakes}
+    sys.modules.update(fakes)
+    try:
+        yield
+    finally:
+        for name, module in saved.items():
+            if module is None: sys.modules.pop(name, None)
+            else: sys.modules[name] = module
+
+# --- BENCHMARK ---
+def prepare(folder=BENCH_FOLDER, video_seconds=60, size=(1080, 1920), log=print):
+    videos = os.path.join(folder, "background_videos")
+    os.makedirs(videos, exist_ok=True)
+    video = os.path.join(videos, f"testsrc_{size[0]}x{size[1]}.mp4")
+    if not os.path.exists(video):
+        log(f"🎞️ Erzeuge Test-Hintergrund {size[0]}x{size[1]} ({video_seconds}s)...")
+        make_video(video, video_seconds, size)
+    frames = make_mp3_frames(os.path.join(folder, "tone.mp3"))
+    return videos, frames
+
+def bench_cases(words, fonts, zooms, boxes, backends):
+    for w, font, zoom, box, backend in itertools.product(words, fonts, zooms, boxes, backends):
+        yield {'words': w, 'font': font, 'zoom': zoom, 'bg_box': box, 'backend': backend}
+
+def run_case(params, folder, videos, overrides=None, log=print):
+    # Ein Video durch die echte Pipeline; neuer Generator -> kalte Caches, wie beim ersten Video
+    import engine
+    from metrics import load_records
+    metrics_file = os.path.join(folder, "metrics.jsonl")
+    if os.path.exists(metrics_file): os.remove(metrics_file)
+    config = engine.make_config({
+        **params, 'video_folder': videos, 'output_folder': os.path.join(folder, "output"), 'proxies': False,
+        'topic_history': os.path.join(folder, "topic_history.json"), 'metrics_file': metrics_file,
+        'artifact_cache': False, 'word_cache_disk': False, 'timing': "tts", **(overrides or {}),
+    })
+    gen = engine.VideoGenerator(lambda msg: None)
+    t = time.perf_counter()
+    done, failed = engine.run_topics(gen, [f"Benchmark {params['words']} Wörter"], config)
+    wall = time.perf_counter() - t
+    if failed or not done:
+        return {'params': params, 'ok': False}
+    record = [r for r in load_records(metrics_file) if r['topic'] != "startup"][-1]
+    for path in done: os.remove(path)
+    return {'params': params, 'ok': True, 'wall': round(wall, 3), 'stages': record['stages']}
+
+def run_render_case(params, folder, videos, overrides=None, log=print):
+    # Nur create_video mit synthetischen Timings (ohne LLM, TTS und Pipeline): misst den Render-Pfad allein
+    import engine
+    from metrics import JobMetrics, bind
+    config = engine.make_config({
+        **params, 'video_folder': videos, 'output_folder': os.path.join(folder, "output"), 'proxies': False,
+        'word_cache_disk': False, **(overrides or {}),
+    })
+    audio = make_mp3(os.path.join(folder, f"render_{params['words']}.mp3"), params['words'] * WORD_SECONDS + 0.5)
+    gen = engine.VideoGenerator(lambda msg: None)
+    t = time.perf_counter()
+    try:
+        with bind(JobMetrics("render")) as job:
+            out = gen.create_video(config, audio, synthetic_story(params['words']), result=synthetic_timings(params['words']))
+    except Exception as e:
+        log(f"⚠️ {describe(params)}: {e}")
+        return {'params': params, 'ok': False}
+    wall = time.perf_counter() - t
+    os.remove(out)
+    return {'params': params, 'ok': True, 'wall': round(wall, 3), 'stages': job.stages}
+
+def run_benchmark(cases, folder=BENCH_FOLDER, repeat=1, overrides=None, log=print, render_only=False):
+    # render_only: create_video mit synthetic_timings statt der ganzen Pipeline
+    videos, frames = prepare(folder, log=log)
+    case = run_render_case if render_only else run_case
+    results = []
+    with stand_ins(frames):
+        for params in cases:
+            if render_only: params = {**params, 'render_only': True}
+            runs = [case(params, folder, videos, overrides, log) for _ in range(repeat)]
+            ok = [r for r in runs if r['ok']]
+            if not ok:
+                log(f"❌ {describe(params)}: fehlgeschlagen")
+                results.append({'params': params, 'ok': False})
+                continue
+            # Median-Lauf pro Fall
+            best = sorted(ok, key=lambda r: r['wall'])[len(ok) // 2]
+            best['runs'] = [r['wall'] for r in ok]
+            log(f"⏱️ {describe(params)}: {best['wall']}s ({stage_line(best['stages'])})")
+            results.append(best)
+    return {'time': round(time.time(), 3), 'version': git_version(), 'host': host_info(), 'results': results}
+
+def describe(params):
+    flags = "+".join(k for k in ('zoom', 'bg_box') if params[k]) or "plain"
+    return f"{'render:' if params.get('render_only') else ''}{params['backend']}/{params['words']}w/{params['font']}/{flags}"
+
+def stage_line(stages):
+    return ", ".join(f"{name} {rec['wall']}s" for name, rec in stages.items() if rec['wall'] >= 0.01)
+
+def git_version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def host_info():
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+def save_results(data, folder=RESULTS_FOLDER):
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return path
+
+def compare(old, new):
+    # Zeilen "Fall: alt -> neu (±%)" für alle Fälle, die in beiden Läufen vorkommen
+    before = {describe(r['params']): r for r in old['results'] if r['ok']}
+    lines = []
+    for r in new['results']:
+        name = describe(r['params'])
+        if not r['ok'] or name not in before: continue
+        a, b = before[name]['wall'], r['wall']
+        lines.append(f"{name}: {a}s -> {b}s ({(b - a) / a * 100:+.0f}%)")
+    return lines
+
+# --- SOAK ---
+def run_soak(jobs=200, batch=20, folder=BENCH_FOLDER, overrides=None, log=print):
+    # Ein einziger run_topics-Lauf über alle Jobs (wie der Dienst), alle batch Videos ein health()-Sample
+    import engine
+    from resources import health, format_health
+    videos, frames = prepare(folder, log=log)
+    metrics_file = os.path.join(folder, "soak_metrics.jsonl")
+    if os.path.exists(metrics_file): os.remove(metrics_file)
+    config = engine.make_config({
+        'words': 20, 'draft': True, 'video_folder': videos, 'output_folder': os.path.join(folder, "output"), 'proxies': False,
+        'topic_history': os.path.join(folder, "soak_history.json"), 'metrics_file': metrics_file,
+        'artifact_cache': False, 'word_cache_disk': False, 'timing': "tts", 'health_interval': 0, **(overrides or {}),
+    })
+    gen = engine.VideoGenerator(lambda msg: None)
+    samples, count = [], [0]
+
+    def on_done(path):
+        os.remove(path)
+        count[0] += 1
+        if count[0] % batch and count[0] != jobs: return
+        sample = {'jobs': count[0], **health()}
+        log(f"🩺 {count[0]}/{jobs} Jobs: {format_health(sample)}")
+        samples.append(sample)
+
+    with stand_ins(frames):
+        _, failed = engine.run_topics(gen, [f"Soak {i}" for i in range(jobs)], config, on_done=on_done)
+    return samples, failed
+
+def soak_problems(samples, failed=(), warmup=1, max_rss_mb=64, max_fds=16, max_children=2, max_threads=4):
+    # Wachstum gegenüber dem Sample nach den Aufwärmrunden (Caches und Thread-Pools sind dann da).
+    # Gemessen wird mitten im Lauf, ein Video kann gerade rendern -> kleine Toleranz für dessen
+    # Reader/Pipes. Ohne gc.collect(), damit Reader, die erst der GC aufräumt, genauso auffallen wie im Betrieb.
+    problems = [f"{len(failed)} fehlgeschlagene Jobs"] if failed else []
+    if len(samples) <= warmup:
+        return problems + ["zu wenige Runden für einen Vergleich"]
+    base, rest = samples[max(warmup - 1, 0)], samples[warmup:]
+    for key, limit, unit in (('rss_mb', max_rss_mb, " MB"), ('fds', max_fds, ""), ('children', max_children, ""), ('threads', max_threads, "")):
+        if base[key] is None: continue
+        peak = max(s[key] for s in rest)
+        if peak - base[key] > limit:
+            problems.append(f"{key}: {base[key]}{unit} -> {peak}{unit} (erlaubt +{limit}{unit})")
+    return problems
@@ -0,0 +1,171 @@
+import sys
+import json
+import signal
+import argparse
+import threading
+
+# Headless Einstieg für Render-Server / Cron, z.B.:
+#   python -m cli render --topics topics.txt --config cfg.json
+# Importiert bewusst weder customtkinter noch das Dashboard.
+
+def log(msg):
+    print(f">> {msg}", flush=True)
+
+def load_topics(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+def load_config(path):
+    if not path: return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def cmd_render(args):
+    import engine
+    topics = load_topics(args.topics)
+    if not topics:
+        log("❌ Keine Themen gefunden.")
+        return 1
+    overrides = load_config(args.config)
+    if args.infinite: overrides['infinite'] = True
+    if args.draft: overrides['draft'] = True
+    if args.reuse_story: overrides['reuse_story'] = True
+    config = engine.make_config(overrides)
+
+    # Dienstbetrieb (--infinite unter systemd/docker): SIGTERM beendet laufende Schritte, neue Jobs starten nicht mehr
+    stop = threading.Event()
+    def request_stop(signum, frame):
+        log("🛑 Stop angefordert, beende nach den laufenden Schritten...")
+        stop.set()
+    signal.signal(signal.SIGTERM, request_stop)
+
+    gen = engine.VideoGenerator(log)
+    done, failed = engine.run_topics(gen, topics, config, should_run=lambda: not stop.is_set())
+    log(f"💎 BATCH BEENDET: {len(done)} Videos, {len(failed)} Fehler.")
+    return 1 if failed else 0
+
+def cmd_index(args):
+    from backgrounds import BackgroundLibrary
+    entries = BackgroundLibrary(args.videos, log=log).refresh()
+    total = sum(e['duration'] for e in entries.values())
+    log(f"📼 {len(entries)} Videos indexiert ({round(total / 60, 1)} Minuten Material).")
+    return 0
+
+def cmd_ingest(args):
+    from backgrounds import ingest, BackgroundLibrary, proxy_subfolder
+    w, _, h = args.size.partition("x")
+    built = ingest(args.videos, args.proxies, (int(w), int(h)), args.fps, args.darken, log=log)
+    for darken in {0.0, *args.darken}:
+        BackgroundLibrary(proxy_subfolder(args.proxies, darken), log=log).refresh()
+    log(f"🎞️ {built} Proxies erstellt.")
+    return 0
+
+def cmd_metrics(args):
+    # Zusammenfassung über alle Jobs in der Datei (auch über mehrere Läufe) zur Kapazitätsplanung
+    from metrics import load_records, summarize, format_summary
+    records = [r for r in load_records(args.file) if r['topic'] != "startup" and (r.get('ok') or args.failed)][-args.last:]
+    if not records:
+        log("❌ Keine Messwerte gefunden.")
+        return 1
+    summary = summarize(records)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for line in format_summary(summary): log(line)
+        walls = sorted(r['wall'] for r in records)
+        log(f"🎬 {len(records)} Jobs, Median {walls[len(walls) // 2]}s pro Video")
+    return 0
+
+def default_font():
+    from fonts import get_system_fonts
+    fonts = get_system_fonts()
+    return next((f for f in ("Impact", "DejaVu Sans", "Arial") if f in fonts), fonts[0])
+
+def cmd_bench(args):
+    # Offline-Benchmark: Stand-ins für ollama/edge_tts, synthetisches Footage, Ergebnis als JSON
+    import bench
+    fonts = args.fonts or [default_font()]
+    flags = {'both': [False, True], 'on': [True], 'off': [False]}
+    cases = list(bench.bench_cases(args.words, fonts, flags[args.zoom], flags[args.box], args.backends))
+    log(f"🏁 {len(cases)} Fälle x {args.repeat} Läufe...")
+    data = bench.run_benchmark(cases, args.work, args.repeat, log=log, render_only=args.render_only)
+    log(f"💾 Ergebnis: {bench.save_results(data, args.out)}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            for line in bench.compare(json.load(f), data): log(f"📈 {line}")
+    return 0 if all(r['ok'] for r in data['results']) else 1
+
+def cmd_soak(args):
+    # Dauerbetrieb im Zeitraffer: viele kurze Offline-Jobs, danach müssen die Ressourcen flach sein
+    import bench
+    overrides = {'words': args.words, 'backend': args.backend, 'font': args.font or default_font()}
+    samples, failed = bench.run_soak(args.jobs, args.batch, args.work, overrides, log=log)
+    problems = bench.soak_problems(samples, failed, args.warmup, args.max_rss, args.max_fds, args.max_children, args.max_threads)
+    for problem in problems: log(f"❌ {problem}")
+    if not problems: log(f"✅ {args.jobs} Jobs ohne Ressourcen-Wachstum.")
+    return 1 if problems else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli", description="Viral Engine ohne Dashboard")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    render = sub.add_parser("render", help="Themenliste im Batch rendern")
+    render.add_argument("--topics", required=True, help="Textdatei, ein Thema pro Zeile")
+    render.add_argument("--config", help="JSON mit Settings (gleiche Keys wie create_video config)")
+    render.add_argument("--infinite", action="store_true", help="Nach der Liste ähnliche Themen weiter suchen")
+    render.add_argument("--draft", action="store_true", help="Nur Entwurf: erste Sekunden in 360p / 12 fps")
+    render.add_argument("--reuse-story", action="store_true", help="Gespeicherte Story zum Thema wiederverwenden (nur neu rendern)")
+    render.set_defaults(func=cmd_render)
+
+    index = sub.add_parser("index", help="Index der Hintergrund-Videos aktualisieren")
+    index.add_argument("--videos", default="background_videos", help="Ordner mit Hintergrund-Videos")
+    index.set_defaults(func=cmd_index)
+
+    ingest = sub.add_parser("ingest", help="Hintergrund-Videos einmalig auf 9:16 / 24 fps normalisieren")
+    ingest.add_argument("--videos", default="background_videos", help="Ordner mit Hintergrund-Videos")
+    ingest.add_argument("--proxies", default="background_proxies", help="Zielordner für Proxies")
+    ingest.add_argument("--size", default="1080x1920", help="Zielauflösung BxH")
+    ingest.add_argument("--fps", type=int, default=24)
+    ingest.add_argument("--darken", type=float, nargs="*", default=[0.4], help="Zusätzlich vorab abgedunkelte Varianten")
+    ingest.set_defaults(func=cmd_ingest)
+    metrics = sub.add_parser("metrics", help="Messwerte pro Stage zusammenfassen (p50/p95)")
+    metrics.add_argument("--file", default="cache/metrics.jsonl", help="JSON-Lines-Datei der Messwerte")
+    metrics.add_argument("--last", type=int, default=1000, help="Nur die letzten N Jobs")
+    metrics.add_argument("--failed", action="store_true", help="Fehlgeschlagene Jobs mitzählen")
+    metrics.add_argument("--json", action="store_true", help="Als JSON ausgeben")
+    metrics.set_defaults(func=cmd_metrics)
+
+    bench = sub.add_parser("bench", help="Offline-Benchmark ohne Ollama/TTS/echtes Footage")
+    bench.add_argument("--words", type=int, nargs="+", default=[50, 150, 400], help="Wortanzahlen")
+    bench.add_argument("--fonts", nargs="+", help="Schriftarten (Standard: eine vorhandene)")
+    bench.add_argument("--zoom", choices=["both", "on", "off"], default="both")
+    bench.add_argument("--box", choices=["both", "on", "off"], default="off")
+    bench.add_argument("--backends", nargs="+", default=["moviepy", "ffmpeg"])
+    bench.add_argument("--render-only", action="store_true", help="Nur create_video mit synthetischen Wort-Timings")
+    bench.add_argument("--repeat", type=int, default=1, help="Läufe pro Fall (Median zählt)")
+    bench.add_argument("--work", default="bench_work", help="Arbeitsordner für Test-Footage")
+    bench.add_argument("--out", default="bench_results", help="Ordner für die JSON-Ergebnisse")
+    bench.add_argument("--compare", help="Älteres Ergebnis-JSON zum Vergleich")
+    bench.set_defaults(func=cmd_bench)
+
+    soak = sub.add_parser("soak", help="Soak-Test: viele Offline-Jobs, Ressourcen müssen flach bleiben")
+    soak.add_argument("--jobs", type=int, default=200)
+    soak.add_argument("--batch", type=int, default=20, help="Ein Health-Sample alle N Jobs")
+    soak.add_argument("--words", type=int, default=20)
+    soak.add_argument("--font", help="Schriftart (Standard: eine vorhandene)")
+    soak.add_argument("--backend", choices=["moviepy", "ffmpeg"], default="moviepy")
+    soak.add_argument("--warmup", type=int, default=1, help="Samples, die nicht zählen")
+    soak.add_argument("--max-rss", type=float, default=64, help="Erlaubtes RSS-Wachstum in MB")
+    soak.add_argument("--max-fds", type=int, default=16)
+    soak.add_argument("--max-children", type=int, default=2)
+    soak.add_argument("--max-threads", type=int, default=4)
+    soak.add_argument("--work", default="bench_work", help="Arbeitsordner für Test-Footage")
+    soak.set_defaults(func=cmd_soak)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
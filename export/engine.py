@@ -0,0 +1,491 @@
+import os
+import random
+import re
+import time
+import uuid
+import threading
+from collections import deque
+from contextlib import ExitStack
+
+from models import WhisperManager
+
+# Schwere Module (whisper/torch, moviepy, ollama, edge_tts) werden erst in dem Schritt
+# importiert, der sie braucht -> Dashboard und CLI starten ohne Wartezeit.
+
+# MoviePy Settings (moviepy liest IMAGEMAGICK_BINARY beim ersten Import). ImageMagick ist nur
+# noch Fallback für Untertitel; ohne die Windows-Installation sucht moviepy selbst (Linux: convert).
+magick_path = os.environ.get("IMAGEMAGICK_BINARY", r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe")
+if os.path.exists(magick_path):
+    os.environ["IMAGEMAGICK_BINARY"] = magick_path
+
+# --- EINSTELLUNGEN ---
+VIDEO_FOLDER = "background_videos"
+OUTPUT_FOLDER = "output_shorts"
+CACHE_FOLDER = "cache"
+LLM_MODEL = "llama3"
+RENDER_FPS = 24
+
+COLOR_PRESETS = {
+    "Dopamine (Random)": ['#FF00FF', '#00FFFF', '#FFFF00', '#00FF00', '#FF3D00', '#FFFFFF'],
+    "Cyberpunk": ['#fdf000', '#ff003c', '#00e0ff', '#711c91'],
+    "Minimal White": ['#FFFFFF'],
+    "Toxic Green": ['#00FF00', '#ADFF2F'],
+    "Fire & Ice": ['#FF4500', '#1E90FF'],
+    "Gold & Black": ['#FFD700', '#B8860B']
+}
+VOICE_MAP = {"Killian (Männlich)": "de-DE-KillianNeural", "Conrad (Männlich)": "de-DE-ConradNeural", "Katja (Weiblich)": "de-DE-KatjaNeural", "Amala (Weiblich)": "de-DE-AmalaNeural"}
+POS_MAP = {"center": "center", "top": 0.2, "bottom": 0.8}
+
+# Gleiche Defaults wie im Dashboard. Render-Keys (speed .. pos_y) gehen 1:1 an create_video,
+# die restlichen steuern Story, Stimme und Whisper.
+DEFAULT_CONFIG = {
+    'words': 150, 'voice': "Killian (Männlich)", 'whisper': "base", 'infinite': False,
+    # Untertitel-Timings: 'auto' (TTS-Wortgrenzen > Alignment des Story-Texts > Whisper), 'tts', 'align' oder 'whisper'
+    'timing': "auto",
+    # Whisper: Gerät ('auto'/'cuda'/'cpu'), Präzision ('auto' = fp16 auf GPU, fp32 auf CPU; 'int8' = schneller
+    # auf der CPU, minimal ungenauer), CPU-Threads (0 = Standard)
+    'whisper_device': "auto", 'whisper_precision': "auto", 'whisper_threads': 0,
+    # LLM: Modell, Host (None = lokal), wie lange ollama es nach der letzten Anfrage geladen hält, Timeout (s), Wiederholungen
+    'llm_model': LLM_MODEL, 'llm_host': None, 'llm_keep_alive': "30m", 'llm_timeout': 120, 'llm_retries': 2,
+    # Infinite Mode: Themen pro LLM-Anfrage, vorgehaltene Themen, ab welcher Ähnlichkeit (MinHash) ein Thema als schon gemacht gilt
+    'topic_batch': 5, 'topic_prefetch': 3, 'topic_similarity': 0.5,
+    # Story als Stream vom LLM, jedes fertige Stück geht sofort an die TTS
+    'stream_story': True,
+    # speed_in_tts: Tempo direkt bei der Sprachsynthese (edge-tts rate) statt nachträglich per speedx
+    'speed': 1.25, 'speed_in_tts': True, 'font': "Impact", 'f_size': 80, 'color_mode': "Dopamine (Random)", 'stroke': 2,
+    'zoom': True, 'zoom_ease': "linear", 'bg_box': False, 'darken': 0.4, 'pos_y': "center",
+    # Hintergrund aus normalisierten Proxies lesen, falls vorhanden (python -m cli ingest)
+    'proxies': True, 'proxy_folder': "background_proxies",
+    # Pipeline: Threads pro Stage und Größe der Queues dazwischen
+    'workers': {'story': 1, 'voice': 2, 'transcribe': 1, 'render': 1}, 'queue_size': 2,
+    # Render-Backend: 'moviepy' (Frames durch Python) oder 'ffmpeg' (ASS-Untertitel, ein Filtergraph)
+    'backend': "moviepy",
+    # Story, Audio und Timings nach Hash der Eingaben zwischenspeichern (neuer Look = nur neu rendern)
+    'artifact_cache': True, 'artifact_cache_mb': 2048,
+    # Gespeicherte Story zum Thema wiederverwenden (neuer Look, gleiche Story). Aus = jedes Mal eine
+    # frische Story; Entwürfe nehmen sie immer, damit Typo-Tests nicht ständig neu generieren
+    'reuse_story': False,
+    # Entwurf zum Testen der Typo: nur die ersten Sekunden, klein und mit wenig fps
+    'draft': False, 'draft_seconds': 10, 'draft_height': 360, 'draft_fps': 12,
+    # Messwerte pro Job und Stage als JSON-Zeilen (cache/metrics.jsonl), Zusammenfassung am Ende
+    'metrics': True,
+    # Sekunden zwischen Health-Meldungen (RSS, offene Dateien, Kindprozesse, Threads), 0 = aus
+    'health_interval': 300,
+    # Untertitel: Text-Backend ('pillow' oder 'imagemagick') und Wort-Cache (RAM-Limit, optional Platte)
+    'text_backend': "pillow", 'word_cache_mb': 256, 'word_cache_disk': False,
+    # Sekunden, die ein Wort-Bitmap vor seinem Start erzeugt wird (danach wieder freigegeben)
+    'subtitle_lookahead': 1.0,
+}
+
+# Infinite Mode: so viele fertige Pfade / Fehler merkt sich run_topics über die Themenliste hinaus
+KEEP_RESULTS = 100
+
+def post_speed(config):
+    # Tempo, das nach der TTS noch auf Audio und Timings angewendet werden muss
+    return 1.0 if config['speed_in_tts'] else config['speed']
+
+def render_settings(config):
+    # (fps, Höhe, max. Dauer): ein Entwurf läuft durch dieselbe Pipeline, nur kleiner und kürzer
+    if config['draft']: return config['draft_fps'], config['draft_height'], config['draft_seconds']
+    return RENDER_FPS, None, None
+
+def make_config(overrides=None):
+    config = dict(DEFAULT_CONFIG)
+    config.update(overrides or {})
+    # Dashboard-Namen ("top", "Killian (Männlich)") und Rohwerte (0.2, "de-DE-...") sind beide erlaubt
+    config['pos_y'] = POS_MAP.get(config['pos_y'], config['pos_y'])
+    config['voice'] = VOICE_MAP.get(config['voice'], config['voice'])
+    config['workers'] = {**DEFAULT_CONFIG['workers'], **config['workers']}
+    return config
+
+class VideoGenerator:
+    def __init__(self, log_callback):
+        self.log = log_callback
+        self.whisper = WhisperManager(log_callback)
+        self.whisper_lock = threading.Lock()
+        self.word_cache = None
+        self.artifacts = None
+        self.llm = self.llm_key = None
+        self.llm_lock = threading.Lock()
+        self.backgrounds = {}
+
+    def load_whisper(self, config):
+        # Modell-Manager: Größe/Gerät/Präzision aus der Config, wechselt bei geändertem Dropdown
+        return self.whisper.get(config['whisper'], config['whisper_device'], config['whisper_precision'], config['whisper_threads'])
+
+    def get_llm(self, config):
+        # Ein Client (eine HTTP-Verbindung) für alle Jobs; neu nur bei anderem Modell/Host
+        from llm import LLMClient
+        with self.llm_lock:
+            key = (config['llm_model'], config['llm_host'], config['llm_keep_alive'], config['llm_timeout'], config['llm_retries'])
+            if self.llm is None or self.llm_key != key:
+                self.llm = LLMClient(*key, log=self.log)
+                self.llm_key = key
+            return self.llm
+
+    def get_artifacts(self, config):
+        # Story/Audio/Timings-Cache, None wenn abgeschaltet
+        from artifacts import ArtifactCache, ARTIFACT_FOLDER
+        if not config['artifact_cache']: return None
+        if self.artifacts is None:
+            self.artifacts = ArtifactCache(config.get('artifact_folder', ARTIFACT_FOLDER), config['artifact_cache_mb'], self.log)
+        return self.artifacts
+
+    def get_word_cache(self, config):
+        # Einmal pro Generator -> gleiche Wörter werden über alle Videos hinweg wiederverwendet
+        from subtitles import WordCache, WORD_CACHE_FOLDER, TEXT_BACKENDS
+        renderer = TEXT_BACKENDS[config['text_backend']]
+        if self.word_cache is None or self.word_cache.renderer is not renderer:
+            disk = os.path.join(WORD_CACHE_FOLDER, config['text_backend']) if config['word_cache_disk'] else None
+            self.word_cache = WordCache(config['word_cache_mb'], disk, renderer)
+        return self.word_cache
+
+    def get_backgrounds(self, folder):
+        # Index pro Ordner, bleibt über alle Jobs im Speicher
+        from backgrounds import BackgroundLibrary
+        if folder not in self.backgrounds:
+            self.backgrounds[folder] = BackgroundLibrary(folder, log=self.log)
+        return self.backgrounds[folder]
+
+    def transcribe(self, audio_path, config):
+        # Ein Modell für alle Pipeline-Threads, geladen erst wenn Whisper wirklich gebraucht wird
+        from metrics import stage
+        # Laden und Benutzen unter demselben Lock: sonst kann ein anderer Thread (Dropdown-Wechsel,
+        # zweiter Transcribe-Worker) das Modell dazwischen austauschen
+        with self.whisper_lock:
+            entry = self.load_whisper(config)
+            with stage("whisper_transcribe"):
+                return entry['model'].transcribe(audio_path, word_timestamps=True, language="de", fp16=entry['fp16'])
+
+    def align(self, audio_path, story_text, config):
+        # Story-Text gegen das Audio ausrichten statt frei zu transkribieren
+        from timings import align_words
+        from metrics import stage
+        with self.whisper_lock:
+            entry = self.load_whisper(config)
+            with stage("whisper_align"):
+                return align_words(entry['model'], audio_path, story_text)
+
+    def create_video(self, config, audio_path, story_text, result=None):
+        self.log("🎬 Rendering gestartet...")
+        if result is None:
+            result = self.transcribe(audio_path, config)
+
+        speed = post_speed(config)
+        _, _, limit = render_settings(config)
+        words = []
+        for segment in result['segments']:
+            for w in segment['words']:
+                preset_list = COLOR_PRESETS.get(config['color_mode'], ['#FFFFFF'])
+                words.append({'text': w['word'].strip().upper(), 'color': random.choice(preset_list),
+                              'start': w['start'] / speed, 'end': w['end'] / speed})
+        if limit: words = [w for w in words if w['start'] < limit]
+
+        output_folder = config.get('output_folder', OUTPUT_FOLDER)
+        if not os.path.exists(output_folder): os.makedirs(output_folder)
+        out_name = os.path.join(output_folder, f"{'draft' if config['draft'] else 'viral'}_{random.randint(1000,9999)}.mp4")
+        if config['backend'] == "ffmpeg":
+            self.render_ffmpeg(config, audio_path, words, out_name)
+        else:
+            self.render_moviepy(config, audio_path, words, out_name)
+        return out_name
+
+    def pick_background(self, config, duration):
+        # Datei + Keyframe-Start aus dem Index, ohne Probe
+        from backgrounds import pick_source
+        bg_folder, darken = pick_source(config, config.get('video_folder', VIDEO_FOLDER))
+        bg_path, bg_start, entry = self.get_backgrounds(bg_folder).pick(duration)
+        return bg_path, bg_start, entry, darken
+
+    def render_moviepy(self, config, audio_path, words, out_name):
+        from moviepy.editor import VideoFileClip, AudioFileClip
+        import moviepy.video.fx.all as vfx
+        from subtitles import SubtitleLayer, scale_bitmap, scale_pos_y
+        from metrics import stage, record
+        word_cache = self.get_word_cache(config)
+        cache_before = word_cache.stats()
+        fps, height, limit = render_settings(config)
+
+        # Alle Reader (ffmpeg-Prozesse, Dateien, Frame-Puffer) gehören zu diesem Job und werden am Ende
+        # geschlossen, auch bei Fehlern - im Infinite Mode liefen sie sonst bis zum Prozessende weiter
+        with ExitStack() as job:
+            with stage("composite"):
+                audio = job.enter_context(AudioFileClip(audio_path))
+                if post_speed(config) != 1.0:
+                    audio = audio.fx(vfx.speedx, post_speed(config))
+                if limit and audio.duration > limit:
+                    audio = audio.subclip(0, limit)
+                bg_path, bg_start, entry, darken = self.pick_background(config, audio.duration + 0.2)
+
+                # Entwurf: ffmpeg skaliert schon beim Dekodieren, die Wörter werden in voller Größe
+                # gerendert (gleicher Cache) und nur verkleinert -> gleiche Proportionen inkl. Rand und Box
+                scale = min(height / entry['height'], 1.0) if height else 1.0
+                # audio=False: kein zweiter ffmpeg-Reader für die Tonspur des Hintergrunds
+                video_clip = job.enter_context(VideoFileClip(bg_path, audio=False, target_resolution=(round(entry['height'] * scale), None) if scale != 1.0 else None))
+                if video_clip.duration < audio.duration:
+                    video_clip = video_clip.fx(vfx.loop, duration=audio.duration + 0.5)
+
+                video_clip = video_clip.subclip(bg_start, bg_start + audio.duration + 0.2).set_audio(audio)
+
+            # Bitmaps (inkl. Box) aus dem Cache, aber erst kurz vor dem Wort und nach seinem Ende wieder
+            # freigegeben - bei langen Storys liegen nicht hunderte Bitmaps gleichzeitig im Speicher
+            def load(w):
+                rgb, mask = word_cache.get(w['text'], config['font'], config['f_size'], w['color'], config['stroke'], config['bg_box'])
+                return scale_bitmap(rgb, mask, scale) if scale != 1.0 else (rgb, mask)
+
+            # Eine Untertitel-Ebene statt CompositeVideoClip mit einem Clip pro Wort (dunkelt auch gleich ab)
+            layer = SubtitleLayer([(w['start'], w['end'], w) for w in words], scale_pos_y(config['pos_y'], scale), config['zoom'], fps,
+                                  config['zoom_ease'], darken, load, config['subtitle_lookahead'])
+            job.callback(layer.close)
+            final = video_clip.fl(layer.apply)
+            with stage("encode") as rec:
+                final.write_videofile(out_name, codec='libx264', audio_codec='aac', fps=fps, threads=4, preset='ultrafast')
+                rec['words'] = len(words)
+                rec['frames'] = int(final.duration * fps)
+
+        # Bitmaps entstehen während des Encodings im Hilfs-Thread, ihre Zeit zählt trotzdem getrennt
+        record("text_render", layer.load_stats)
+        stats = word_cache.stats()
+        self.log(f"🔤 Wort-Cache: {stats['hits'] - cache_before['hits']} Treffer, {stats['misses'] - cache_before['misses']} neu gerendert ({stats['mb']} MB), max. {layer.peak} Wörter gleichzeitig")
+
+    def render_ffmpeg(self, config, audio_path, words, out_name):
+        # Ein einziger ffmpeg-Aufruf, Untertitel als ASS-Skript via libass
+        from ass_render import render_ass_video, media_duration
+        from metrics import stage
+        fps, height, limit = render_settings(config)
+        with stage("composite"):
+            duration = media_duration(audio_path) / post_speed(config) + 0.2
+            if limit: duration = min(duration, limit)
+            bg_path, bg_start, entry, darken = self.pick_background(config, duration)
+        # Entwurf: ASS bleibt in Originalauflösung (PlayRes), libass skaliert mit dem Video
+        scale = min(height / entry['height'], 1.0) if height else 1.0
+        with stage("encode") as rec:
+            render_ass_video(config, words, audio_path, duration, bg_path, bg_start, (entry['width'], entry['height']), darken, out_name, fps, post_speed(config), scale)
+            rec['frames'] = int(duration * fps)
+
+# --- PIPELINE-SCHRITTE (ohne GUI) ---
+# Der Prompt unterdrückt Satzzeichen -> Stücke für die TTS notfalls vor einer Konjunktion trennen
+CLAUSE_WORDS = {"und", "aber", "weil", "dass", "denn", "doch", "dann", "als", "oder", "bis", "während", "obwohl", "plötzlich"}
+SENTENCE_END = re.compile(r"[.!?…]+[\"')]*\s|\n")
+
+def generate_story(llm, topic, words):
+    return llm.story(topic, words)
+
+def speakable_cut(text, min_words=6, max_words=25):
+    # Schnittstelle für das nächste TTS-Stück: Satzende, sonst (ohne Satzzeichen) vor einer
+    # Konjunktion bzw. hart nach max_words. None = noch zu wenig Text, das letzte Wort kann unfertig sein.
+    for m in SENTENCE_END.finditer(text):
+        if len(text[:m.end()].split()) >= min_words: return m.end()
+    words = list(re.finditer(r"\S+", text))
+    if len(words) <= max_words: return None
+    for w in reversed(words[min_words:max_words]):
+        if w.group().lower() in CLAUSE_WORDS: return w.start()
+    return words[max_words].start()
+
+def split_speakable(deltas, min_words=6, max_words=25):
+    buf = ""
+    for delta in deltas:
+        buf += delta
+        while (cut := speakable_cut(buf, min_words, max_words)) is not None:
+            yield buf[:cut].strip()
+            buf = buf[cut:]
+    if buf.strip(): yield buf.strip()
+
+def generate_audio(story, voice, audio_file, speed=1.0):
+    # Gibt die Wortgrenzen der TTS zurück (leer, falls der Dienst keine liefert)
+    from voice import synthesize
+    return synthesize(story, voice, audio_file, speed)
+
+def generate_story_audio(llm, topic, words, voice, audio_file, speed=1.0):
+    # Streaming: jedes fertige Stück der Story geht sofort an die TTS, Audio und Wortgrenzen werden
+    # aneinandergehängt. Dauer ~ max(LLM, TTS) statt der Summe. Gibt (Story, Wortgrenzen) zurück.
+    from voice import synthesize_stream
+    chunks, boundaries = synthesize_stream(split_speakable(llm.stream_story(topic, words)), voice, audio_file, speed)
+    if not chunks: raise RuntimeError("LLM hat keine Story geliefert")
+    return " ".join(chunks), boundaries
+
+def cleanup_job(job):
+    # Nur eigene Temp-Dateien löschen; Audio im Artefakt-Cache bleibt liegen
+    if job.get('audio_temp') and os.path.exists(job['audio_file']): os.remove(job['audio_file'])
+
+def build_pipeline(gen, config, should_run=lambda: True, metrics=None):
+    from pipeline import Pipeline
+    from metrics import bind, stage
+    from timings import get_timings
+    from llm import story_prompt
+    from artifacts import artifact_key, file_hash
+
+    def tts_speed(cfg):
+        return cfg['speed'] if cfg['speed_in_tts'] else 1.0
+
+    def audio_key(job):
+        cfg = job['config']
+        return artifact_key('audio', job['story'], cfg['voice'], tts_speed(cfg))
+
+    def new_audio(job):
+        job['audio_file'], job['audio_temp'] = f"temp_{uuid.uuid4().hex[:8]}.mp3", True
+
+    def store_audio(cache, job):
+        # Temp-mp3 in den Cache verschieben, ab dann gehört die Datei dem Cache
+        key = audio_key(job)
+        job['audio_file'], job['audio_temp'] = cache.put_file(key, ".mp3", job['audio_file']), False
+        cache.put_json(key, job['boundaries'])
+
+    # 1. Story generieren (im Streaming-Modus gleich mit Stimme)
+    def story_stage(job):
+        gen.log(f"🔥 Bearbeite Thema: {job['topic']}")
+        cfg = job['config']
+        cache = gen.get_artifacts(cfg)
+        key = artifact_key('story', cfg['llm_model'], story_prompt(job['topic'], cfg['words']))
+        story = cache.get_json(key) if cache and (cfg['reuse_story'] or cfg['draft']) else None
+        if story:
+            gen.log("💾 Story aus dem Cache")
+            job['story'] = story['text']
+            return job
+        if cfg['stream_story']:
+            new_audio(job)
+            job['story'], job['boundaries'] = generate_story_audio(gen.get_llm(cfg), job['topic'], cfg['words'], cfg['voice'], job['audio_file'], tts_speed(cfg))
+        else:
+            job['story'] = generate_story(gen.get_llm(cfg), job['topic'], cfg['words'])
+        if cache:
+            cache.put_json(key, {'text': job['story']})
+            if job.get('audio_temp'): store_audio(cache, job)
+        return job
+
+    # 2. Audio generieren
+    def voice_stage(job):
+        if 'audio_file' in job: return job
+        cfg = job['config']
+        cache = gen.get_artifacts(cfg)
+        if cache:
+            key = audio_key(job)
+            path, boundaries = cache.get(key, ".mp3"), cache.get_json(key)
+            if path and boundaries is not None:
+                gen.log("💾 Audio aus dem Cache")
+                job['audio_file'], job['audio_temp'], job['boundaries'] = path, False, boundaries
+                return job
+        new_audio(job)
+        job['boundaries'] = generate_audio(job['story'], cfg['voice'], job['audio_file'], tts_speed(cfg))
+        if cache: store_audio(cache, job)
+        return job
+
+    # 3. Untertitel-Timings: Wortgrenzen der TTS, sonst Whisper (GPU) während das vorige Video encodiert
+    def transcribe_stage(job):
+        cfg = job['config']
+        cache = gen.get_artifacts(cfg)
+        # Whisper/Alignment hängen nur am Audio, dem Story-Text und dem Modell
+        key = cached = None
+        if cache:
+            key = artifact_key('timings', file_hash(job['audio_file']), cfg['timing'], cfg['whisper'], cfg['whisper_precision'], job['story'])
+            cached = cache.get_json(key)
+        if cached:
+            job['timings'], source = cached['timings'], f"{cached['source']} (Cache)"
+        else:
+            job['timings'], source = get_timings(gen, cfg, job['audio_file'], job['boundaries'], job['story'])
+            # TTS-Wortgrenzen liegen schon beim Audio
+            if cache and source != "tts": cache.put_json(key, {'timings': job['timings'], 'source': source})
+        gen.log(f"⏱️ Timings für {job['topic']}: {source}")
+        return job
+
+    # 4. Video rendern
+    def render_stage(job):
+        try:
+            job['out'] = gen.create_video(job['config'], job['audio_file'], job['story'], job['timings'])
+        finally:
+            with stage("cleanup"):
+                cleanup_job(job)
+        gen.log(f"✅ Fertig: {job['out']}")
+        return job
+
+    def drop_job(job):
+        cleanup_job(job)
+        if metrics and job.get('metrics'): metrics.finish(job['metrics'], ok=False)
+
+    def timed(name, func, units, last=False):
+        # Misst die ganze Stage und bindet den Job an den Thread, damit auch die Messpunkte
+        # in create_video / Whisper (stage(...)) bei diesem Job landen
+        def run(job):
+            with bind(job.get('metrics')), stage(name) as rec:
+                job = func(job)
+                rec.update(units(job))
+            if last and metrics: metrics.finish(job['metrics'], ok=True, out=job['out'])
+            return job
+        return run
+
+    workers = config['workers']
+    stages = [("story", timed("story", story_stage, lambda job: {'words': len(job['story'].split())}), workers['story']),
+              ("voice", timed("voice", voice_stage, lambda job: {'words': len(job['boundaries'])}), workers['voice']),
+              ("transcribe", timed("timings", transcribe_stage, lambda job: {'words': sum(len(seg['words']) for seg in job['timings']['segments'])}), workers['transcribe']),
+              ("render", timed("render", render_stage, lambda job: {}, last=True), workers['render'])]
+    return Pipeline(stages, gen.log, queue_size=config['queue_size'], should_run=should_run, on_drop=drop_job)
+
+def run_topics(gen, topics, config, should_run=lambda: True, on_done=None):
+    # Arbeitet eine Themenliste ab; im Infinite Mode kommen danach neue Themen aus der Frontier
+    # (im Hintergrund vorgefüllt, gegen die Historie dedupliziert).
+    # config darf auch eine Funktion sein (Dashboard: Slider werden vor jedem Video neu gelesen).
+    # on_done(pfad) läuft nach jedem fertigen Video. Gibt (fertige Videos, fehlgeschlagene Themen)
+    # zurück - im Infinite Mode nur die letzten KEEP_RESULTS, damit der Speicher flach bleibt.
+    from topics import TopicHistory, TopicFrontier, HISTORY_FILE
+    from metrics import MetricsLog, JobMetrics, METRICS_FILE, bind, stage, format_summary
+    from resources import HealthMonitor, format_health
+    get_config = config if callable(config) else (lambda: config)
+    first = get_config()
+    metrics = MetricsLog(first.get('metrics_file', METRICS_FILE)) if first['metrics'] else None
+
+    # Modelle vor der Schleife laden, damit kein Video die Ladezeit zahlt (gemessen als Job "startup")
+    with bind(JobMetrics("startup")) as startup:
+        if first['timing'] in ("whisper", "align"): gen.load_whisper(first)
+        # Entwürfe und Re-Renders holen die Story meist aus dem Cache -> kein Vorwärmen (kalter Modell-Load
+        # bzw. Retries bei gestopptem Ollama); braucht ein Job doch das LLM, lädt es beim ersten Aufruf
+        if not (first['draft'] or first['reuse_story']):
+            try:
+                with stage("llm_warm"):
+                    gen.get_llm(first).warm()
+            except Exception as e:
+                gen.log(f"⚠️ LLM nicht erreichbar: {e}")
+    if metrics: metrics.finish(startup, ok=True)
+
+    # Dauerbetrieb: Ressourcen regelmäßig melden (und mitschreiben), damit Lecks früh auffallen
+    def report_health(h):
+        gen.log(f"🩺 {format_health(h)}")
+        if metrics: metrics.write({'health': h, 'time': round(time.time(), 3)})
+
+    history = TopicHistory(first.get('topic_history', HISTORY_FILE), first['topic_similarity'])
+    frontier = TopicFrontier(lambda: gen.get_llm(get_config()), history, gen.log, first['topic_batch'], first['topic_prefetch'], should_run)
+
+    def jobs():
+        pending = list(topics)
+        while should_run():
+            cfg = get_config()
+            if pending:
+                topic = pending.pop(0)
+                # Entwürfe sind nur Typo-Tests: weder Historie noch Frontier, sonst verändern sie die Themenauswahl
+                if not cfg['draft']:
+                    history.add(topic)
+                    frontier.seed(topic)
+                    # Frontier schon während der Liste füllen, damit der Übergang nahtlos ist
+                    if not pending and cfg['infinite']: frontier.start()
+            elif cfg['infinite'] and not cfg['draft']:
+                topic = frontier.next()
+                if topic is None: return
+                gen.log(f"🔍 Nächstes Thema aus der Frontier: {topic}")
+            else:
+                return
+            yield {'topic': topic, 'config': cfg, 'metrics': JobMetrics(topic)}
+
+    # Von fertigen Jobs bleibt nur der Pfad bzw. das Thema, die Job-Dicts (Story, Timings, ...) nicht
+    done, failed = deque(maxlen=len(topics) + KEEP_RESULTS), deque(maxlen=len(topics) + KEEP_RESULTS)
+    def finished(job):
+        done.append(job['out'])
+        if on_done: on_done(job['out'])
+
+    monitor = HealthMonitor(first['health_interval'], report_health).start()
+    try:
+        n_done, n_failed = build_pipeline(gen, first, should_run, metrics).run(jobs(), finished, lambda job: failed.append(job['topic']))
+    finally:
+        frontier.close()
+        monitor.close()
+    if n_done > len(done): gen.log(f"🏁 {n_done} Videos fertig, {n_failed} Fehler")
+    if metrics and n_done:
+        for line in format_summary(metrics.summary()): gen.log(line)
+    return list(done), list(failed)
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import threading
+
+from engine import CACHE_FOLDER
+
+# Persistenter Font-Index {Name: Datei}. matplotlib (bzw. PIL) wird nur gebraucht,
+# wenn sich ein Font-Ordner geändert hat - sonst reicht ein JSON-Load beim Start.
+FONT_INDEX_FILE = os.path.join(CACHE_FOLDER, "font_index.json")
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc')
+
+# Im Prozess geladener Index: die Signatur (rekursiver Scan der Font-Ordner) wird nur einmal pro
+# Prozess geprüft, danach kostet find_font_file() nur noch ein Dict-Lookup. refresh=True liest neu ein.
+_index = None
+_index_lock = threading.Lock()
+
+def font_dirs():
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        local = os.environ.get("LOCALAPPDATA", os.path.join(home, "AppData", "Local"))
+        dirs = [os.path.join(windir, "Fonts"), os.path.join(local, "Microsoft", "Windows", "Fonts")]
+    elif sys.platform == "darwin":
+        dirs = ["/Library/Fonts", "/System/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    else:
+        dirs = ["/usr/share/fonts", "/usr/local/share/fonts", os.path.join(home, ".fonts"), os.path.join(home, ".local", "share", "fonts")]
+    return [d for d in dirs if os.path.isdir(d)]
+
+def font_dirs_signature():
+    # Neueste mtime aller Font-Ordner (inkl. Unterordner). Neue/gelöschte Fonts ändern die
+    # mtime ihres Ordners, Dateien selbst müssen nicht angefasst werden.
+    latest = 0.0
+    stack = font_dirs()
+    while stack:
+        d = stack.pop()
+        try:
+            latest = max(latest, os.stat(d).st_mtime)
+            with os.scandir(d) as it:
+                stack.extend(e.path for e in it if e.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
+    return latest
+
+def scan_fonts():
+    try:
+        import matplotlib.font_manager as fm
+        return {f.name: f.fname for f in fm.fontManager.ttflist}
+    except ImportError:
+        pass
+    # Fallback ohne matplotlib: Familienname direkt aus der Datei lesen
+    from PIL import ImageFont
+    index = {}
+    for d in font_dirs():
+        for root, _, files in os.walk(d):
+            for name in files:
+                if not name.lower().endswith(FONT_EXTENSIONS): continue
+                path = os.path.join(root, name)
+                try:
+                    index.setdefault(ImageFont.truetype(path, 10).getname()[0], path)
+                except Exception:
+                    index.setdefault(os.path.splitext(name)[0], path)
+    return index
+
+def load_font_index(refresh=False):
+    global _index
+    with _index_lock:
+        if _index is None or refresh:
+            _index = read_font_index()
+        return _index
+
+def read_font_index():
+    signature = font_dirs_signature()
+    try:
+        with open(FONT_INDEX_FILE, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get('signature') == signature:
+            return cached['fonts']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    fonts = scan_fonts()
+    os.makedirs(CACHE_FOLDER, exist_ok=True)
+    with open(FONT_INDEX_FILE, "w", encoding="utf-8") as f:
+        json.dump({'signature': signature, 'fonts': fonts}, f)
+    return fonts
+
+def get_system_fonts():
+    fonts = sorted(load_font_index())
+    return [f for f in fonts if len(f) < 20 and not f.startswith("@")] or ["Impact"]
+
+def find_font_file(name):
+    return load_font_index().get(name)
@@ -0,0 +1,133 @@
+import re
+import time
+import threading
+
+# Ein dauerhafter ollama.Client pro Generator: Modell bleibt per keep_alive geladen, die Länge ist
+# über num_predict hart begrenzt und wird nachträglich auf das Wort-Budget gekürzt. Ein fester
+# num_ctx ist wichtig - ein anderer Wert pro Anfrage würde ollama das Modell neu laden lassen.
+
+STORY_PREAMBLE = re.compile(r"^(Hier ist|Sicher|Gerne).*?[:\n]", re.IGNORECASE | re.DOTALL)
+SENTENCE_END = re.compile(r"[.!?…]+[\"')]*(\s|$)")
+# Llama 3 braucht für deutschen Text grob 2 Tokens pro Wort
+TOKENS_PER_WORD = 2.0
+# Bis zu 10% über dem Slider-Wert bleibt stehen, der Rest wird abgeschnitten
+WORD_SLACK = 0.1
+NUM_CTX = 2048
+
+def story_prompt(topic, words):
+    return f"Schreibe eine fesselnde Reddit-Story zu '{topic}'. benutze keine satzzeichen. Ungefähr {int(words)} Wörter. Starte direkt mit der Story. Deutsch."
+
+def related_prompt(topic, n, avoid=()):
+    prompt = f"Nenne mir {int(n)} verschiedene, extrem virale Reddit-Themen ähnlich wie '{topic}'. Eine Zeile pro Thema, nur das Thema, kein Satz drumherum."
+    if avoid: prompt += " Nicht diese (schon gemacht): " + "; ".join(avoid)
+    return prompt
+
+def parse_topics(text):
+    # Eine Zeile pro Thema; Nummerierung, Aufzählungszeichen und Anführungszeichen entfernen
+    lines = (re.sub(r"^\s*(\d+[.)]|[-*•])\s*", "", l).strip().strip('"„“').strip() for l in text.splitlines())
+    return [l for l in lines if l and not l.endswith(":")]
+
+def word_budget(words):
+    return int(words * (1 + WORD_SLACK))
+
+def trim_words(text, words):
+    # Auf das Budget kürzen, möglichst an einem Satzende in der zweiten Hälfte
+    budget = word_budget(words)
+    found = list(re.finditer(r"\S+", text))
+    if len(found) <= budget: return text.strip()
+    cut = text[:found[budget - 1].end()]
+    ends = [m.end() for m in SENTENCE_END.finditer(cut) if len(cut[:m.end()].split()) >= budget // 2]
+    return cut[:ends[-1]].strip() if ends else cut.strip()
+
+def strip_preamble(deltas):
+    # Wie STORY_PREAMBLE bei der ganzen Antwort, nur dass der Anfang erst gepuffert wird, bis er feststeht
+    head, deltas = "", iter(deltas)
+    for delta in deltas:
+        head += delta
+        if STORY_PREAMBLE.match(head) or (len(head) >= 8 and not head.lower().startswith(("hier ist", "sicher", "gerne"))):
+            break
+    yield STORY_PREAMBLE.sub("", head)
+    yield from deltas
+
+def limit_words(deltas, words):
+    # Stream-Variante von trim_words: hört nach dem Budget hart auf (der Satz davor ist schon gesprochen)
+    budget, count, prev_space = word_budget(words), 0, True
+    for delta in deltas:
+        for i, ch in enumerate(delta):
+            if prev_space and not ch.isspace():
+                count += 1
+                if count > budget:
+                    if i: yield delta[:i]
+                    return
+            prev_space = ch.isspace()
+        yield delta
+
+class LLMClient:
+    def __init__(self, model, host=None, keep_alive="30m", timeout=120, retries=2, log=print):
+        import ollama
+        self.model = model
+        self.keep_alive = keep_alive
+        self.retries = retries
+        self.log = log
+        self.client = ollama.Client(host=host, timeout=timeout)
+        self.errors = (ollama.ResponseError, OSError)
+        try:
+            import httpx
+            self.errors += (httpx.HTTPError,)
+        except ImportError:
+            pass
+        self.warm_lock = threading.Lock()
+        self.warm_done = False
+
+    def options(self, words):
+        # num_predict aus dem Slider (mit Luft für Tokens, die das Trimmen wieder abschneidet)
+        return {'num_predict': int(word_budget(words) * TOKENS_PER_WORD) + 32, 'num_ctx': NUM_CTX}
+
+    def warm(self):
+        # Modell einmal laden, bevor die Schleife startet; leerer Prompt lädt nur
+        with self.warm_lock:
+            if self.warm_done: return
+            t = time.time()
+            self._retry(lambda: self.client.generate(model=self.model, prompt="", keep_alive=self.keep_alive, options={'num_ctx': NUM_CTX}))
+            self.warm_done = True
+            self.log(f"🦙 {self.model} geladen ({round(time.time() - t, 1)}s, keep_alive {self.keep_alive})")
+
+    def _retry(self, call):
+        for attempt in range(self.retries + 1):
+            try:
+                return call()
+            except self.errors as e:
+                if attempt == self.retries: raise
+                self.log(f"⚠️ LLM-Fehler ({e}), Versuch {attempt + 2}/{self.retries + 1}...")
+                time.sleep(2 ** attempt)
+
+    def chat(self, prompt, options=None):
+        resp = self._retry(lambda: self.client.chat(model=self.model, messages=[{'role': 'user', 'content': prompt}],
+                                                    options=options or {'num_ctx': NUM_CTX}, keep_alive=self.keep_alive))
+        return resp['message']['content']
+
+    def stream(self, prompt, options=None):
+        # Wiederholt wird nur, solange noch nichts geliefert wurde - danach hängt schon Audio dran
+        started = False
+        for attempt in range(self.retries + 1):
+            try:
+                for part in self.client.chat(model=self.model, messages=[{'role': 'user', 'content': prompt}],
+                                             options=options or {'num_ctx': NUM_CTX}, keep_alive=self.keep_alive, stream=True):
+                    started = True
+                    yield part['message']['content']
+                return
+            except self.errors as e:
+                if started or attempt == self.retries: raise
+                self.log(f"⚠️ LLM-Fehler ({e}), Versuch {attempt + 2}/{self.retries + 1}...")
+                time.sleep(2 ** attempt)
+
+    def story(self, topic, words):
+        text = self.chat(story_prompt(topic, words), self.options(words))
+        return trim_words(STORY_PREAMBLE.sub("", text), words)
+
+    def stream_story(self, topic, words):
+        return limit_words(strip_preamble(self.stream(story_prompt(topic, words), self.options(words))), words)
+
+    def related_topics(self, topic, n=5, avoid=()):
+        # Mehrere Kandidaten pro Anfrage (Frontier im Infinite Mode)
+        return parse_topics(self.chat(related_prompt(topic, n, avoid), {'num_predict': 32 * n, 'num_ctx': NUM_CTX}))[:n]
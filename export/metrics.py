@@ -0,0 +1,178 @@
+import os
+import json
+import math
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from engine import CACHE_FOLDER
+from resources import rss_mb
+
+# Messpunkte pro Job und Stage: Wall-Zeit, CPU-Zeit des Threads (+ Kindprozesse wie ffmpeg),
+# Spitzen-RSS während der Stage und verarbeitete Einheiten (Wörter, Frames). Pro Job eine
+# JSON-Zeile in METRICS_FILE, am Ende eines Laufs eine Zusammenfassung (p50/p95 pro Stage).
+# stage() misst nur, wenn im aktuellen Thread ein Job gebunden ist - sonst kostet es nichts.
+METRICS_FILE = os.path.join(CACHE_FOLDER, "metrics.jsonl")
+SAMPLE_INTERVAL = 0.1
+
+_local = threading.local()
+
+def children_cpu():
+    # CPU-Zeit beendeter Kindprozesse (ffmpeg, ffprobe); prozessweit, bei parallelen Stages nur grob
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+    except ImportError:
+        return 0.0
+
+class RssSampler:
+    # Ein Thread für alle offenen Stages; misst RSS alle SAMPLE_INTERVAL Sekunden
+    def __init__(self):
+        self.records = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def track(self, rec):
+        self._sample([rec])
+        with self.lock:
+            self.records[id(rec)] = rec
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self.thread.start()
+
+    def untrack(self, rec):
+        with self.lock:
+            self.records.pop(id(rec), None)
+        self._sample([rec])
+
+    def _sample(self, recs):
+        rss = rss_mb()
+        if rss is None: return
+        for rec in recs:
+            rec['rss_peak_mb'] = round(max(rec.get('rss_peak_mb') or 0, rss), 1)
+
+    def _run(self):
+        while True:
+            time.sleep(SAMPLE_INTERVAL)
+            with self.lock:
+                recs = list(self.records.values())
+            if recs: self._sample(recs)
+
+_sampler = RssSampler()
+
+class JobMetrics:
+    def __init__(self, topic):
+        self.topic = topic
+        self.started = time.time()
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, rec):
+        # Gleiche Stage mehrfach (z.B. Wiederholung): Zeiten und Einheiten addieren
+        with self.lock:
+            old = self.stages.get(name)
+            if old:
+                for k, v in rec.items():
+                    old[k] = max(old.get(k) or 0, v) if k == 'rss_peak_mb' else round(old.get(k, 0) + v, 3)
+            else:
+                self.stages[name] = rec
+
+    def to_dict(self, **extra):
+        return {'topic': self.topic, 'started': round(self.started, 3), 'wall': round(time.time() - self.started, 3), 'stages': self.stages, **extra}
+
+@contextmanager
+def bind(job_metrics):
+    # Ordnet alle stage()-Aufrufe dieses Threads dem Job zu
+    prev = getattr(_local, 'job', None)
+    _local.job = job_metrics
+    try:
+        yield job_metrics
+    finally:
+        _local.job = prev
+
+@contextmanager
+def stage(name):
+    # with stage("encode") as rec: ... rec['frames'] = n
+    job = getattr(_local, 'job', None)
+    if job is None:
+        yield {}
+        return
+    rec = {}
+    t0, c0, k0 = time.perf_counter(), time.thread_time(), children_cpu()
+    _sampler.track(rec)
+    try:
+        yield rec
+    finally:
+        _sampler.untrack(rec)
+        rec.update(wall=round(time.perf_counter() - t0, 3), cpu=round(time.thread_time() - c0, 3),
+                   cpu_children=round(children_cpu() - k0, 3))
+        job.add(name, rec)
+
+def record(name, rec):
+    # Anderswo gemessene Stage (z.B. in einem Hilfs-Thread) dem Job dieses Threads zuordnen
+    job = getattr(_local, 'job', None)
+    if job is not None: job.add(name, {k: round(v, 3) for k, v in rec.items()})
+
+def percentile(values, p):
+    # Nearest-Rank
+    values = sorted(values)
+    if not values: return None
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def summarize(records):
+    # {stage: {'n', 'wall_p50', 'wall_p95', 'cpu_p50', 'cpu_p95', 'rss_peak_mb_max', <Einheiten>/s}}
+    by_stage = {}
+    for record in records:
+        for name, rec in record.get('stages', {}).items():
+            by_stage.setdefault(name, []).append(rec)
+    summary = {}
+    for name, recs in by_stage.items():
+        walls = [r['wall'] for r in recs]
+        row = {'n': len(recs),
+               'wall_p50': percentile(walls, 50), 'wall_p95': percentile(walls, 95),
+               'cpu_p50': percentile([r['cpu'] + r.get('cpu_children', 0) for r in recs], 50),
+               'cpu_p95': percentile([r['cpu'] + r.get('cpu_children', 0) for r in recs], 95),
+               'rss_peak_mb_max': max((r.get('rss_peak_mb') or 0 for r in recs), default=None)}
+        for unit in ('words', 'frames'):
+            total = sum(r.get(unit, 0) for r in recs)
+            # Durchsatz nur bei messbarer Dauer (übersprungene Stages haben ~0s)
+            if total and sum(walls) >= 0.01: row[f'{unit}_per_s'] = round(total / sum(walls), 1)
+        summary[name] = row
+    return summary
+
+class MetricsLog:
+    # Hängt JSON-Zeilen an die Datei an und merkt sich die letzten Jobs dieses Laufs für summary()
+    def __init__(self, path=METRICS_FILE, keep=1000):
+        self.path = path
+        self.records = deque(maxlen=keep)
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, record):
+        with self.lock:
+            self.records.append(record)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def finish(self, job_metrics, **extra):
+        self.write(job_metrics.to_dict(**extra))
+
+    def summary(self):
+        with self.lock:
+            jobs = [r for r in self.records if 'stages' in r]
+        summary = summarize(jobs)
+        self.write({'summary': summary, 'jobs': len(jobs), 'time': round(time.time(), 3)})
+        return summary
+
+def load_records(path=METRICS_FILE):
+    with open(path, encoding="utf-8") as f:
+        return [r for r in (json.loads(line) for line in f if line.strip()) if 'stages' in r]
+
+def format_summary(summary):
+    lines = []
+    for name, row in sorted(summary.items(), key=lambda kv: -(kv[1]['wall_p50'] or 0)):
+        units = "".join(f", {row[k]} {k.split('_')[0]}/s" for k in ('words_per_s', 'frames_per_s') if k in row)
+        lines.append(f"📊 {name}: p50 {row['wall_p50']}s / p95 {row['wall_p95']}s, CPU p50 {row['cpu_p50']}s, RSS max {row['rss_peak_mb_max']} MB{units} (n={row['n']})")
+    return lines
@@ -0,0 +1,86 @@
+import gc
+import time
+import threading
+from collections import OrderedDict
+
+from resources import rss_mb
+
+class WhisperManager:
+    # Geladene Whisper-Modelle nach (Größe, Gerät, Präzision). Mit max_models=1 bleibt genau ein
+    # Modell warm; wechselt das Dropdown, wird das alte entladen und das neue geladen.
+    def __init__(self, log, max_models=1):
+        self.log = log
+        self.max_models = max_models
+        self.models = OrderedDict()
+        self.lock = threading.Lock()
+
+    def resolve(self, size, device="auto", precision="auto"):
+        import torch
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        if precision == "auto":
+            # GPU: fp16-Aktivierungen, CPU: fp32 (int8 nur auf ausdrücklichen Wunsch)
+            precision = "fp16" if device == "cuda" else "fp32"
+        if precision == "fp16" and device != "cuda":
+            precision = "fp32"
+        return (size, device, precision)
+
+    def get(self, size, device="auto", precision="auto", threads=0):
+        import torch
+        if threads: torch.set_num_threads(int(threads))
+        key = self.resolve(size, device, precision)
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                return self.models[key]
+            while len(self.models) >= self.max_models:
+                self._evict(next(iter(self.models)))
+            from metrics import stage
+            with stage("whisper_load"):
+                self.models[key] = self._load(*key)
+            return self.models[key]
+
+    def _load(self, size, device, precision):
+        import whisper
+        self.log(f"🧠 Lade Whisper {size} ({device}, {precision})...")
+        t0, rss0 = time.time(), rss_mb()
+        model = whisper.load_model(size, device=device)
+        if precision == "int8":
+            model = quantize_int8(model)
+        entry = {'model': model, 'key': (size, device, precision), 'fp16': precision == "fp16", 'load_s': round(time.time() - t0, 2), 'mb': None}
+        if device == "cuda":
+            import torch
+            entry['mb'] = round(torch.cuda.memory_allocated() / 1024 / 1024)
+        elif rss0 is not None:
+            entry['mb'] = round(rss_mb() - rss0)
+        self.log(f"🧠 Whisper {size} bereit in {entry['load_s']}s ({entry['mb']} MB)")
+        return entry
+
+    def _evict(self, key):
+        # Nur aus dem Cache nehmen: ein Aufrufer kann den Eintrag noch halten, freigegeben wird das
+        # Modell, sobald ihn niemand mehr benutzt
+        self.models.pop(key)
+        self.log(f"♻️ Entlade Whisper {key[0]} ({key[1]}, {key[2]})")
+        gc.collect()
+        if key[1] == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+
+    def evict(self, key=None):
+        # key=None: alle Modelle entladen
+        with self.lock:
+            for k in ([key] if key else list(self.models)):
+                if k in self.models: self._evict(k)
+
+    def info(self):
+        with self.lock:
+            return [{'key': e['key'], 'load_s': e['load_s'], 'mb': e['mb']} for e in self.models.values()]
+
+def quantize_int8(model):
+    # whisper.model.Linear ist nur eine Unterklasse mit dtype-Cast; für quantize_dynamic zurück auf nn.Linear
+    import torch
+    import whisper.model
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
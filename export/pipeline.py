@@ -0,0 +1,77 @@
+import queue
+import threading
+
+_DONE = object()
+
+class Pipeline:
+    # Producer/Consumer-Kette: jede Stage hat eigene Worker-Threads und eine begrenzte Eingangs-Queue.
+    # Ist eine Queue voll, blockiert die Stage davor (Backpressure). So bekommt Thema N+1 schon
+    # Story und Audio, während Thema N noch encodiert wird.
+    def __init__(self, stages, log, queue_size=2, should_run=lambda: True, on_drop=None):
+        # stages: Liste von (name, func, workers) - func(job) gibt den (erweiterten) Job zurück
+        self.stages = stages
+        self.log = log
+        self.should_run = should_run
+        self.on_drop = on_drop or (lambda job: None)
+        self.queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages] + [queue.Queue()]
+        self.remaining = [max(1, workers) for _, _, workers in stages]
+        self.lock = threading.Lock()
+        self.failed = 0
+        self.on_fail = lambda job: None
+
+    def _worker(self, idx):
+        name, func, _ = self.stages[idx]
+        q_in, q_out = self.queues[idx], self.queues[idx + 1]
+        while True:
+            job = q_in.get()
+            if job is _DONE:
+                q_in.put(_DONE) # für die anderen Worker dieser Stage
+                break
+            if not self.should_run():
+                # Gestoppt: Warteschlange leeren statt neue Arbeit anzufangen
+                self.on_drop(job)
+                continue
+            try:
+                job = func(job)
+            except Exception as e:
+                self.log(f"❌ Fehler bei {job.get('topic')} ({name}): {e}")
+                with self.lock:
+                    self.failed += 1
+                    self.on_fail(job)
+                self.on_drop(job)
+                continue
+            q_out.put(job)
+
+        with self.lock:
+            self.remaining[idx] -= 1
+            last = self.remaining[idx] == 0
+        if last: q_out.put(_DONE)
+
+    def _feed(self, jobs):
+        try:
+            for job in jobs:
+                if not self.should_run(): break
+                self.queues[0].put(job)
+        except Exception as e:
+            self.log(f"❌ Fehler: {e}")
+        finally:
+            self.queues[0].put(_DONE)
+
+    def run(self, jobs, on_done=lambda job: None, on_fail=lambda job: None):
+        # jobs: Iterator von Job-Dicts; darf beliebig lang sein (Infinite Mode). Fertige und
+        # fehlgeschlagene Jobs gehen nur an die Callbacks und werden nicht gesammelt - sonst wächst
+        # der Speicher im Dauerbetrieb mit jedem Video. Gibt (fertig, fehlgeschlagen) als Anzahl zurück.
+        self.on_fail = on_fail
+        threads = [threading.Thread(target=self._feed, args=(jobs,), daemon=True)]
+        for idx, (name, _, workers) in enumerate(self.stages):
+            threads += [threading.Thread(target=self._worker, args=(idx,), name=f"{name}-{i}", daemon=True) for i in range(max(1, workers))]
+        for t in threads: t.start()
+
+        done = 0
+        while True:
+            job = self.queues[-1].get()
+            if job is _DONE: break
+            done += 1
+            on_done(job)
+        for t in threads: t.join()
+        return done, self.failed
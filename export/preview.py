@@ -0,0 +1,97 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from engine import COLOR_PRESETS, VIDEO_FOLDER, RENDER_FPS
+
+# Standbild für das Dashboard: echter Hintergrund-Frame + Untertitel-Ebene aus subtitles.py, also
+# dieselbe Schrift, Rand, Box, Position und Abdunklung wie im Video. Der Frame wird einmal klein
+# dekodiert und gecacht - Slider-Änderungen rendern nur noch das Wort (meist aus dem Wort-Cache).
+PREVIEW_HEIGHT = 480
+SAMPLE_TEXT = "VORSCHAU"
+
+class PreviewRenderer:
+    def __init__(self, gen, height=PREVIEW_HEIGHT, max_frames=8):
+        self.gen = gen
+        self.height = height
+        self.max_frames = max_frames
+        self.frames = OrderedDict()
+        self.sources = {}
+
+    def source(self, config):
+        # Immer dasselbe (erste) Video des Ordners, damit die Vorschau beim Ziehen nicht springt
+        from backgrounds import pick_source
+        folder, darken = pick_source(config, config.get('video_folder', VIDEO_FOLDER))
+        if folder not in self.sources:
+            try:
+                entries = self.gen.get_backgrounds(folder).refresh()
+            except OSError:
+                entries = {}
+            name = min(entries, default=None)
+            self.sources[folder] = (os.path.join(folder, name), entries[name]) if name else (None, None)
+        path, entry = self.sources[folder]
+        return path, entry, darken
+
+    def frame(self, path, entry, t):
+        # Hintergrund-Frame bei t (klein dekodiert), ohne Video ein neutrales 9:16-Grau
+        if path is None:
+            return np.full((self.height, self.height * 9 // 16, 3), 60, np.uint8), self.height / 1920
+        key = (path, round(t % max(entry['duration'], 0.1), 2))
+        if key not in self.frames:
+            from moviepy.editor import VideoFileClip
+            clip = VideoFileClip(path, audio=False, target_resolution=(min(self.height, entry['height']), None))
+            try:
+                self.frames[key] = clip.get_frame(min(key[1], max(clip.duration - 0.05, 0)))
+            finally:
+                clip.close()
+            while len(self.frames) > self.max_frames: self.frames.popitem(last=False)
+        self.frames.move_to_end(key)
+        frame = self.frames[key]
+        return frame, frame.shape[0] / entry['height']
+
+    def render(self, config, t=1.0, text=SAMPLE_TEXT):
+        # -> RGB uint8, genau wie SubtitleLayer.draw ein Video-Frame zeichnet (Zoom ist schon abgeschlossen)
+        from subtitles import SubtitleLayer, scale_bitmap, scale_pos_y
+        path, entry, darken = self.source(config)
+        frame, scale = self.frame(path, entry, t)
+        color = COLOR_PRESETS.get(config['color_mode'], ['#FFFFFF'])[0]
+        rgb, mask = self.gen.get_word_cache(config).get(text, config['font'], config['f_size'], color, config['stroke'], config['bg_box'])
+        if scale != 1.0: rgb, mask = scale_bitmap(rgb, mask, scale)
+        layer = SubtitleLayer([(0.0, 1.0, (rgb, mask))], scale_pos_y(config['pos_y'], scale), False, RENDER_FPS, config['zoom_ease'], darken)
+        return layer.draw(frame, 0.5)
+
+class PreviewWorker:
+    # Rendert im Hintergrund-Thread; nur die jeweils letzte Anfrage zählt (Slider-Ziehen erzeugt
+    # dutzende). Das Dashboard holt das Ergebnis per poll() im Tk-Thread ab.
+    def __init__(self, renderer, log=print):
+        self.renderer = renderer
+        self.log = log
+        self.cond = threading.Condition()
+        self.request = None
+        self.result = None
+        threading.Thread(target=self._run, name="preview", daemon=True).start()
+
+    def submit(self, config, t=1.0):
+        with self.cond:
+            self.request = (config, t)
+            self.cond.notify()
+
+    def poll(self):
+        with self.cond:
+            result, self.result = self.result, None
+        return result
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.request is None: self.cond.wait()
+                (config, t), self.request = self.request, None
+            try:
+                image = self.renderer.render(config, t)
+            except Exception as e:
+                self.log(f"⚠️ Vorschau: {e}")
+                continue
+            with self.cond:
+                self.result = image
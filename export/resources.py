@@ -0,0 +1,84 @@
+import os
+import threading
+
+# Kleine Helfer für Speicher-/Ressourcen-Angaben, ohne Pflicht-Abhängigkeit auf psutil
+
+def rss_mb():
+    # Aktueller Arbeitsspeicher des Prozesses in MB (None, falls nicht ermittelbar)
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        # Kein Rückgriff auf ru_maxrss: das ist der Spitzenwert, nicht der aktuelle Verbrauch
+        return None
+
+def open_fds():
+    # Offene Dateideskriptoren bzw. Handles des Prozesses (None, falls nicht ermittelbar)
+    try:
+        import psutil
+        proc = psutil.Process()
+        return proc.num_fds() if hasattr(proc, "num_fds") else proc.num_handles()
+    except ImportError:
+        pass
+    for folder in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(folder))
+        except OSError:
+            continue
+    return None
+
+def child_processes():
+    # Noch laufende direkte Kindprozesse (ffmpeg-Reader, ImageMagick, ...)
+    try:
+        import psutil
+        return len(psutil.Process().children())
+    except ImportError:
+        pass
+    pid, count = str(os.getpid()), 0
+    try:
+        entries = [e for e in os.listdir("/proc") if e.isdigit()]
+    except OSError:
+        return None
+    for entry in entries:
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Feld nach "(name) state" ist die PPID; der Name selbst kann Leerzeichen enthalten
+                if f.read().rsplit(")", 1)[1].split()[1] == pid: count += 1
+        except (OSError, IndexError):
+            continue
+    return count
+
+def health():
+    rss = rss_mb()
+    return {'rss_mb': round(rss, 1) if rss is not None else None, 'fds': open_fds(),
+            'children': child_processes(), 'threads': threading.active_count()}
+
+def format_health(h):
+    return f"RSS {h['rss_mb']} MB, {h['fds']} offene Dateien, {h['children']} Kindprozesse, {h['threads']} Threads"
+
+class HealthMonitor:
+    # Meldet health() alle interval Sekunden an report() (eigener Thread, 0 = aus)
+    def __init__(self, interval, report):
+        self.interval = interval
+        self.report = report
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.interval > 0:
+            self.thread = threading.Thread(target=self._run, name="health", daemon=True)
+            self.thread.start()
+        return self
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.report(health())
+
+    def close(self):
+        self.stopped.set()
+        if self.thread is not None: self.thread.join()
@@ -0,0 +1,272 @@
+import os
+import hashlib
+import time
+import threading
+from bisect import bisect_right
+from functools import lru_cache
+from collections import OrderedDict
+
+import numpy as np
+
+from engine import CACHE_FOLDER
+
+WORD_CACHE_FOLDER = os.path.join(CACHE_FOLDER, "words")
+BOX_PAD = (25, 15)
+BOX_OPACITY = 0.7
+
+def word_key(text, font, size, color, stroke, box):
+    # Randstärke kommt als Float vom Slider -> gerundet, sonst gibt es kaum Treffer
+    return (text, font, int(size), color.lower(), round(float(stroke), 1), bool(box))
+
+# --- TEXT-BACKENDS: (text, font, size, color, stroke) -> (RGB uint8, Maske float32) ---
+def render_word_imagemagick(text, font, size, color, stroke):
+    # Fallback: ein ImageMagick-Prozess pro Wort
+    from moviepy.editor import TextClip
+    txt = TextClip(text, font=font, fontsize=size, color=color, stroke_color='black', stroke_width=stroke, method='label')
+    rgb, mask = txt.get_frame(0), txt.mask.get_frame(0).astype(np.float32)
+    txt.close()
+    return rgb, mask
+
+@lru_cache(maxsize=64)
+def load_truetype(font, size):
+    from PIL import ImageFont
+    from fonts import find_font_file
+    for candidate in (find_font_file(font), font, f"{font}.ttf"):
+        if not candidate: continue
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return None
+
+def render_word_pillow(text, font, size, color, stroke):
+    # In-Process mit Pillow/FreeType, kein Subprozess
+    from PIL import Image, ImageDraw
+    pil_font = load_truetype(font, int(size))
+    if pil_font is None:
+        return render_word_imagemagick(text, font, size, color, stroke)
+
+    sw = int(round(stroke))
+    left, _, right, _ = pil_font.getbbox(text, stroke_width=sw)
+    ascent, descent = pil_font.getmetrics()
+    # Feste Zeilenhöhe wie bei ImageMagick 'label', damit Wörter nicht springen
+    w, h = max(1, right - left), ascent + descent + 2 * sw
+    xy = (-left, sw)
+
+    # Farbe und Deckkraft getrennt zeichnen: mit Rand liegt außen immer Schwarz,
+    # ohne Rand reicht eine Vollfläche in der Textfarbe (keine dunklen Kanten).
+    rgb_img = Image.new("RGB", (w, h), 'black' if sw else color)
+    ImageDraw.Draw(rgb_img).text(xy, text, font=pil_font, fill=color, stroke_width=sw, stroke_fill='black')
+    mask_img = Image.new("L", (w, h), 0)
+    ImageDraw.Draw(mask_img).text(xy, text, font=pil_font, fill=255, stroke_width=sw, stroke_fill=255)
+    return np.asarray(rgb_img), np.asarray(mask_img, dtype=np.float32) / 255.0
+
+TEXT_BACKENDS = {'pillow': render_word_pillow, 'imagemagick': render_word_imagemagick}
+
+def add_box(rgb, mask):
+    # Schwarze Box (70%) direkt ins Bitmap, statt eines eigenen ColorClips pro Wort
+    h, w = mask.shape
+    pw, ph = BOX_PAD
+    y, x = ph // 2, pw // 2
+    out_mask = np.full((h + ph, w + pw), BOX_OPACITY, np.float32)
+    out_rgb = np.zeros((h + ph, w + pw, 3), np.uint8)
+    combined = mask + BOX_OPACITY * (1 - mask)
+    out_mask[y:y+h, x:x+w] = combined
+    out_rgb[y:y+h, x:x+w] = (rgb * (mask / combined)[..., None]).astype(np.uint8)
+    return out_rgb, out_mask
+
+class WordCache:
+    # LRU-Cache für gerenderte Wörter (RGB + Maske), begrenzt auf max_mb. Lebt im VideoGenerator
+    # und wird so über alle Videos im Infinite Mode geteilt; optional zusätzlich auf der Platte.
+    def __init__(self, max_mb=256, disk_folder=None, renderer=render_word_pillow):
+        self.max_bytes = max_mb * 1024 * 1024
+        self.disk_folder = disk_folder
+        self.renderer = renderer
+        self.items = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+        if disk_folder: os.makedirs(disk_folder, exist_ok=True)
+
+    def get(self, text, font, size, color, stroke, box):
+        key = word_key(text, font, size, color, stroke, box)
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+            self.misses += 1
+
+        bitmap = self._load(key)
+        if bitmap is None:
+            rgb, mask = self.renderer(*key[:5])
+            bitmap = add_box(rgb, mask) if box else (rgb, mask)
+            self._save(key, bitmap)
+
+        with self.lock:
+            if key not in self.items:
+                self.items[key] = bitmap
+                self.bytes += bitmap[0].nbytes + bitmap[1].nbytes
+            while self.bytes > self.max_bytes and len(self.items) > 1:
+                _, (rgb, mask) = self.items.popitem(last=False)
+                self.bytes -= rgb.nbytes + mask.nbytes
+        return bitmap
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'words': len(self.items), 'mb': round(self.bytes / 1024 / 1024, 1)}
+
+    def _path(self, key):
+        return os.path.join(self.disk_folder, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".npz")
+
+    def _load(self, key):
+        if not self.disk_folder: return None
+        try:
+            with np.load(self._path(key)) as data:
+                return data['rgb'], data['mask']
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save(self, key, bitmap):
+        if not self.disk_folder: return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, rgb=bitmap[0], mask=bitmap[1])
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp): os.remove(tmp)
+
+# --- UNTERTITEL-EBENE ---
+def layout_y(pos_y, frame_h, h):
+    # 'center' oder relative Höhe (0.2 = oberer Rand bei 20%), Werte > 1 sind Pixel
+    if pos_y == 'center': return (frame_h - h) // 2
+    return int(pos_y * frame_h) if pos_y <= 1 else int(pos_y)
+
+def scale_pos_y(pos_y, scale):
+    # Für verkleinerte Frames (Entwurf, Vorschau): nur Pixelwerte mitskalieren
+    return pos_y * scale if pos_y != 'center' and pos_y > 1 else pos_y
+
+# Pop-In: Skalierung über die ersten ZOOM_TIME Sekunden, p = 0..1. 'linear' entspricht dem
+# bisherigen vfx.resize(0.8 + 1.5*t), die anderen laufen sauber bis 1.0.
+ZOOM_TIME = 0.1
+ZOOM_EASINGS = {
+    'linear': lambda p: 0.8 + 0.15 * p,
+    'ease_out': lambda p: 0.8 + 0.2 * (1 - (1 - p) ** 3),
+    'back': lambda p: 0.8 + 0.2 * (1 + 2.70158 * (p - 1) ** 3 + 1.70158 * (p - 1) ** 2),
+}
+
+def scale_bitmap(rgb, mask, scale):
+    from PIL import Image
+    h, w = mask.shape
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    return (np.asarray(Image.fromarray(rgb).resize(size, Image.BILINEAR)),
+            np.asarray(Image.fromarray(mask).resize(size, Image.BILINEAR)))
+
+def blit(frame, rgb, mask, x, y):
+    # Alpha-Blending nur im Bereich des Wortes, abgeschnitten am Bildrand
+    fh, fw = frame.shape[:2]
+    h, w = mask.shape
+    x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + w, fw), min(y + h, fh)
+    if x0 >= x1 or y0 >= y1: return
+    m = mask[y0-y:y1-y, x0-x:x1-x, None]
+    roi = frame[y0:y1, x0:x1]
+    frame[y0:y1, x0:x1] = (rgb[y0-y:y1-y, x0-x:x1-x] * m + roi * (1 - m)).astype(np.uint8)
+
+class SubtitleLayer:
+    # Alle Wörter als eine Ebene über dem Hintergrund. Die Startzeiten liegen sortiert vor, pro Frame
+    # werden per bisect nur die gerade aktiven Wörter gesucht und direkt ins Frame geblendet -
+    # die Kosten pro Frame hängen nicht von der Länge der Story ab.
+    # Mit load() entstehen die Bitmaps erst lookahead Sekunden vor dem Wort (Hintergrund-Thread) und
+    # werden nach seinem Ende wieder freigegeben: der Speicher hängt nur von den gleichzeitig
+    # sichtbaren Wörtern ab, nicht von der Länge der Story.
+    def __init__(self, words, pos_y='center', zoom=False, fps=24, ease='linear', darken=0.0, load=None, lookahead=1.0):
+        # words: Liste von (start, end, item); item ist das Bitmap (rgb, mask) oder, mit load, die Eingabe für load(item)
+        self.words = sorted(words, key=lambda w: w[0])
+        self.starts = [w[0] for w in self.words]
+        self.max_len = max((w[1] - w[0] for w in self.words), default=0)
+        self.pos_y = pos_y
+        self.zoom = zoom
+        self.fps = fps
+        self.ease = ZOOM_EASINGS[ease]
+        self.zoom_frames = {}
+        self.load = load
+        self.lookahead = lookahead
+        self.bitmaps = {}
+        self.peak = 0
+        self.executor = None
+        # Zeit für das Erzeugen der Bitmaps (im Hilfs-Thread) -> Stage "text_render"
+        self.load_stats = {'wall': 0.0, 'cpu': 0.0, 'words': 0}
+        # Abdunkeln als uint8-Lookup-Table (gleiches Ergebnis wie vfx.colorx, aber ohne Float-Kopien)
+        self.lut = (np.arange(256) * (1 - darken)).astype(np.uint8) if darken > 0 else None
+
+    def zoomed(self, i, rgb, mask, t):
+        # Nur die ersten Frames (bei 24 fps: 3) werden skaliert, einmal pro Bitmap vorberechnet;
+        # danach wird das Original-Bitmap benutzt.
+        k = int(t * self.fps)
+        if not self.zoom or k >= ZOOM_TIME * self.fps: return rgb, mask
+        key = (i, k)
+        if key not in self.zoom_frames:
+            self.zoom_frames[key] = scale_bitmap(rgb, mask, self.ease(k / (ZOOM_TIME * self.fps)))
+        return self.zoom_frames[key]
+
+    def prefetch(self, t):
+        # Fenster: noch nicht beendete Wörter, die bis t + lookahead anfangen. Alles außerhalb wird
+        # freigegeben (auch nach einem Sprung zurück, dann wird eben neu geladen).
+        lo = bisect_right(self.starts, t - self.max_len)
+        hi = bisect_right(self.starts, t + self.lookahead if self.load else t)
+        window = {i for i in range(lo, hi) if t < self.words[i][1]}
+        for i in [i for i in self.bitmaps if i not in window]:
+            future = self.bitmaps.pop(i)
+            if future is not None: future.cancel()
+        if self.zoom_frames and any(k[0] not in window for k in self.zoom_frames):
+            self.zoom_frames = {k: v for k, v in self.zoom_frames.items() if k[0] in window}
+        for i in sorted(window - self.bitmaps.keys()):
+            self.bitmaps[i] = self.submit(self.words[i][2])
+        self.peak = max(self.peak, len(self.bitmaps))
+        return sorted(i for i in window if self.starts[i] <= t)
+
+    def submit(self, item):
+        if self.load is None: return None
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(1, thread_name_prefix="subtitles")
+        return self.executor.submit(self._load, item)
+
+    def _load(self, item):
+        t0, c0 = time.perf_counter(), time.thread_time()
+        bitmap = self.load(item)
+        self.load_stats['wall'] += time.perf_counter() - t0
+        self.load_stats['cpu'] += time.thread_time() - c0
+        self.load_stats['words'] += 1
+        return bitmap
+
+    def bitmap(self, i):
+        future = self.bitmaps[i]
+        return self.words[i][2] if future is None else future.result()
+
+    def draw(self, frame, t):
+        # Frames vom Reader nie direkt beschreiben (moviepy liefert bei Wiederholung denselben Puffer).
+        # Das Abdunkeln erzeugt ohnehin eine neue Kopie, in die dann alle Wörter geblendet werden.
+        if self.lut is not None: frame = np.take(self.lut, frame)
+        active = self.prefetch(t)
+        if not active: return frame
+        if self.lut is None: frame = np.array(frame)
+        fh, fw = frame.shape[:2]
+        for i in active:
+            rgb, mask = self.zoomed(i, *self.bitmap(i), t - self.starts[i])
+            h, w = mask.shape
+            blit(frame, rgb, mask, (fw - w) // 2, layout_y(self.pos_y, fh, h))
+        return frame
+
+    def apply(self, get_frame, t):
+        # Signatur für clip.fl(): ersetzt das Compositing von hunderten Einzel-Clips
+        return self.draw(get_frame(t), t)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        self.bitmaps.clear()
+        self.zoom_frames.clear()
@@ -0,0 +1,92 @@
+# Timing-Quellen für die Untertitel. Alle liefern die Whisper-Struktur
+# {'segments': [{'words': [{'word', 'start', 'end'}]}]} in Sekunden der erzeugten Audiodatei;
+# create_video teilt danach noch durch post_speed(config) (1.0, wenn das Tempo schon in der TTS steckt).
+
+def from_boundaries(boundaries):
+    return {'segments': [{'words': [dict(b) for b in boundaries]}]}
+
+def from_whisper(gen, audio_file, config):
+    return gen.transcribe(audio_file, config)
+
+def get_timings(gen, config, audio_file, boundaries=None, story_text=None):
+    # 'auto': Wortgrenzen der TTS, sonst Alignment des Story-Texts, Whisper-Transkription als letzter Weg.
+    # 'tts' / 'align' / 'whisper' erzwingen eine Quelle.
+    source = config['timing']
+    if source in ("auto", "tts") and boundaries:
+        return from_boundaries(boundaries), "tts"
+    if source == "tts":
+        raise RuntimeError("TTS hat keine Wortgrenzen geliefert")
+    if source in ("auto", "align") and story_text:
+        try:
+            result = from_alignment(gen, audio_file, story_text, config)
+            if result['segments'][0]['words']: return result, "align"
+        except Exception as e:
+            if source == "align": raise
+            gen.log(f"⚠️ Alignment fehlgeschlagen, nutze Whisper: {e}")
+    return from_whisper(gen, audio_file, config), "whisper"
+
+# Whisper-Standard aus transcribe(): diese Zeichen gehören zum Wort davor bzw. danach
+PREPEND_PUNCTUATIONS = "\"'“¿([{-"
+APPEND_PUNCTUATIONS = "\"'.。,，!！?？:：”)]}、"
+
+def merge_marks(timing):
+    # find_alignment liefert Satzzeichen als eigene "Wörter"; wie Whisper nach dem Transkribieren
+    # ans Wort hängen und die geleerten Einträge entfernen. Was übrig bleibt und keinen Buchstaben
+    # hat (z.B. "..."), kommt ans vorige Wort.
+    from whisper.timing import merge_punctuations
+    merge_punctuations(timing, PREPEND_PUNCTUATIONS, APPEND_PUNCTUATIONS)
+    merged = []
+    for t in timing:
+        if not t.word.strip(): continue
+        if merged and not any(c.isalnum() for c in t.word):
+            merged[-1].word += t.word
+            merged[-1].end = t.end
+        else:
+            merged.append(t)
+    return merged
+
+def align_words(model, audio_file, story_text, language="de", window=30.0, keep=0.8):
+    # Forced Alignment des bekannten Story-Texts gegen das Audio: Whisper rechnet pro 30s-Fenster
+    # nur einen Forward-Pass mit vorgegebenen Tokens (Cross-Attention + DTW), kein Beam Search.
+    # Die Wörter pro Fenster werden über die Sprechrate geschätzt; weil DTW den Text auf das
+    # ganze Fenster streckt, zählen nur die ersten 80% - der Rest beginnt das nächste Fenster.
+    import whisper
+    from whisper.audio import log_mel_spectrogram, pad_or_trim, SAMPLE_RATE, N_FRAMES, HOP_LENGTH
+    from whisper.tokenizer import get_tokenizer
+    from whisper.timing import find_alignment
+
+    audio = whisper.load_audio(audio_file)
+    total = len(audio) / SAMPLE_RATE
+    words = story_text.split()
+    rate = len(words) / max(total, 0.1)
+    tokenizer = get_tokenizer(model.is_multilingual, language=language, task="transcribe")
+    dtype = next(model.parameters()).dtype
+    n_mels = getattr(model.dims, 'n_mels', 80)
+
+    aligned, i, offset = [], 0, 0.0
+    while i < len(words) and offset < total:
+        chunk = audio[int(offset * SAMPLE_RATE):int((offset + window) * SAMPLE_RATE)]
+        last = total - offset <= window
+        part = words[i:] if last else words[i:i + max(1, int(rate * window))]
+        mel = pad_or_trim(log_mel_spectrogram(chunk, n_mels), N_FRAMES).to(model.device).to(dtype)
+        num_frames = min(N_FRAMES, len(chunk) // HOP_LENGTH)
+        timing = merge_marks(find_alignment(model, tokenizer, tokenizer.encode(" " + " ".join(part)), mel, num_frames))
+        if not timing: break
+
+        kept = timing if last else [t for t in timing if t.end <= window * keep] or timing[:1]
+        aligned += [{'word': t.word, 'start': offset + t.start, 'end': offset + t.end} for t in kept]
+        # Weiterzählen über die Zeichen: die Tokens ergeben exakt den Skript-Text, die Wortgrenzen
+        # des Alignments müssen aber nicht die des Skripts sein
+        chars = sum(len(t.word.replace(" ", "")) for t in kept)
+        while i < len(words) and chars > 0:
+            chars -= len(words[i])
+            i += 1
+        offset += kept[-1].end if last else timing[len(kept)].start if len(kept) < len(timing) else kept[-1].end
+
+    # Nur vollständig: sonst fehlen dem Rest der Story die Untertitel ('auto' nimmt dann Whisper)
+    if sum(len(w['word'].replace(" ", "")) for w in aligned) != len("".join(words)):
+        raise RuntimeError(f"Alignment unvollständig ({len(aligned)} Wörter für {len(words)} im Skript)")
+    return {'segments': [{'words': aligned}]}
+
+def from_alignment(gen, audio_file, story_text, config):
+    return gen.align(audio_file, story_text, config)
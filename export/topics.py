@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import zlib
+import random
+import threading
+from collections import deque
+
+import numpy as np
+
+from engine import CACHE_FOLDER
+
+# Themen-Frontier für den Infinite Mode: das LLM liefert mehrere Kandidaten pro Anfrage, ein
+# Hintergrund-Thread hält die Queue gefüllt, und alles wird gegen die Historie geprüft - exakt
+# (normalisiert) und unscharf per MinHash über Zeichen-Trigramme ("Mein Chef hat mich gefeuert"
+# ~ "mein chef feuert mich"). So liegt zwischen zwei Videos keine LLM-Wartezeit mehr.
+HISTORY_FILE = os.path.join(CACHE_FOLDER, "topic_history.json")
+NUM_PERM = 64
+_PRIME = (1 << 61) - 1
+# Feste Seeds -> Signaturen bleiben über Programmstarts vergleichbar
+_rng = random.Random(20240607)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def normalize_topic(text):
+    # Nummerierung, Aufzählungszeichen, Anführungszeichen und Satzzeichen weg, klein, ein Leerzeichen
+    text = re.sub(r"^\s*(\d+[.)]|[-*•])\s*", "", text)
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+def minhash(norm, k=3):
+    padded = f" {norm} "
+    shingles = {zlib.crc32(padded[i:i + k].encode("utf-8")) for i in range(max(1, len(padded) - k + 1))}
+    return [min((a * x + b) % _PRIME for x in shingles) for a, b in _PERMS]
+
+class TopicHistory:
+    # Bereits verwendete Themen (normalisiert + Signatur). path=None -> nur im Speicher
+    def __init__(self, path=HISTORY_FILE, threshold=0.5):
+        self.path = path
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.topics, self.norms, sigs = [], set(), []
+        for item in self._load():
+            self.topics.append(item['topic'])
+            self.norms.add(item['norm'])
+            sigs.append(item['sig'])
+        self.sigs = np.array(sigs, dtype=np.uint64).reshape(-1, NUM_PERM)
+
+    def _load(self):
+        if not self.path: return []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _save(self):
+        if not self.path: return
+        items = [{'topic': t, 'norm': normalize_topic(t), 'sig': [int(v) for v in s]} for t, s in zip(self.topics, self.sigs)]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def similarity(self, topic):
+        # Höchste geschätzte Jaccard-Ähnlichkeit zu einem bekannten Thema (1.0 = exakt gleich)
+        norm = normalize_topic(topic)
+        with self.lock:
+            if norm in self.norms: return 1.0
+            if not len(self.sigs): return 0.0
+            sig = np.array(minhash(norm), dtype=np.uint64)
+            return float((self.sigs == sig).mean(axis=1).max())
+
+    def is_duplicate(self, topic):
+        return not normalize_topic(topic) or self.similarity(topic) >= self.threshold
+
+    def add(self, topic):
+        norm = normalize_topic(topic)
+        if not norm: return
+        with self.lock:
+            if norm in self.norms: return
+            self.topics.append(topic)
+            self.norms.add(norm)
+            self.sigs = np.vstack([self.sigs, np.array(minhash(norm), dtype=np.uint64)])
+            self._save()
+
+class TopicFrontier:
+    # Vorgefüllte Queue neuer Themen. get_llm() wird pro Anfrage gerufen (Config kann sich ändern).
+    def __init__(self, get_llm, history, log, batch=5, prefetch=3, should_run=lambda: True):
+        self.get_llm = get_llm
+        self.history = history
+        self.log = log
+        self.batch = batch
+        self.prefetch = prefetch
+        self.should_run = should_run
+        self.queue = deque()
+        # Kandidaten in der Queue zählen auch als "schon da", werden aber erst beim Abholen gespeichert
+        self.queued = TopicHistory(None, history.threshold)
+        self.seeds = deque(maxlen=5)
+        self.cond = threading.Condition()
+        self.thread = None
+        self.closed = False
+
+    def seed(self, topic):
+        with self.cond:
+            self.seeds.append(topic)
+            self.cond.notify_all()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._fill, name="topic-frontier", daemon=True)
+            self.thread.start()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def _running(self):
+        return not self.closed and self.should_run()
+
+    def _fill(self):
+        misses = 0
+        while self._running():
+            with self.cond:
+                while self._running() and (len(self.queue) >= self.prefetch or not self.seeds):
+                    self.cond.wait(0.5)
+                if not self._running(): return
+                seed = random.choice(self.seeds)
+            try:
+                # Die letzten Themen gleich im Prompt ausschließen
+                candidates = self.get_llm().related_topics(seed, self.batch, self.history.topics[-10:])
+            except Exception as e:
+                self.log(f"⚠️ Themensuche fehlgeschlagen: {e}")
+                candidates = []
+            fresh = []
+            for c in candidates:
+                # Auch gegen die übrigen Kandidaten derselben Antwort
+                if self.history.is_duplicate(c) or self.queued.is_duplicate(c): continue
+                self.queued.add(c)
+                fresh.append(c)
+            with self.cond:
+                self.queue.extend(fresh)
+                self.cond.notify_all()
+            # Nur Duplikate/Fehler: warten statt das LLM im Kreis zu fragen
+            misses = 0 if fresh else misses + 1
+            if misses:
+                if candidates: self.log(f"♻️ Nur bekannte Themen vom LLM, neuer Versuch in {min(2 ** misses, 30)}s")
+                with self.cond:
+                    self.cond.wait_for(lambda: not self._running(), min(2 ** misses, 30))
+
+    def next(self):
+        # Nächstes neues Thema (blockiert nur, wenn die Queue wirklich leer ist); None bei Stopp
+        self.start()
+        with self.cond:
+            while not self.queue:
+                if not self._running(): return None
+                self.cond.wait(0.5)
+            topic = self.queue.popleft()
+            self.cond.notify_all()
+        self.history.add(topic)
+        self.seed(topic)
+        return topic
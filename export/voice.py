@@ -0,0 +1,82 @@
+import queue
+import asyncio
+import threading
+
+# Edge-TTS mit Wortgrenzen: der Stream liefert neben den Audio-Chunks auch 'WordBoundary'-Events
+# (Offset/Dauer in 100ns). Die werden beim Speichern mitgeschrieben und ersparen Whisper.
+
+def tts_rate(speed):
+    # 1.25 -> "+25%": der Dienst spricht schneller, Tonhöhe bleibt, Timings passen ohne Umrechnung
+    return f"{int(round((speed - 1) * 100)):+d}%"
+
+def make_communicate(text, voice, speed=1.0):
+    import edge_tts
+    try:
+        # Neuere edge-tts Versionen liefern per Default nur Satzgrenzen
+        return edge_tts.Communicate(text, voice, rate=tts_rate(speed), boundary="WordBoundary")
+    except TypeError:
+        return edge_tts.Communicate(text, voice, rate=tts_rate(speed))
+
+# Edge-TTS liefert CBR-MP3 (24 kHz, 48 kbit/s) ohne Header -> Dauer eines Stücks = Bytes / 6000
+MP3_BYTES_PER_SEC = 48000 / 8
+
+async def _write_stream(f, text, voice, speed, boundaries, offset=0.0):
+    # Hängt das Audio an f an und verschiebt die Wortgrenzen um offset; gibt die Bytes zurück
+    written = 0
+    async for chunk in make_communicate(text, voice, speed).stream():
+        if chunk["type"] == "audio":
+            f.write(chunk["data"])
+            written += len(chunk["data"])
+        elif chunk["type"] == "WordBoundary":
+            start = offset + chunk["offset"] / 1e7
+            boundaries.append({'word': chunk["text"], 'start': start, 'end': start + chunk["duration"] / 1e7})
+    return written
+
+async def _synthesize(text, voice, audio_file, speed=1.0):
+    boundaries = []
+    with open(audio_file, "wb") as f:
+        await _write_stream(f, text, voice, speed, boundaries)
+    return boundaries
+
+def synthesize(text, voice, audio_file, speed=1.0):
+    # Schreibt die mp3 und gibt die Wortgrenzen zurück (Sekunden in der erzeugten Datei)
+    return asyncio.run(_synthesize(text, voice, audio_file, speed))
+
+async def _synthesize_queue(q, voice, audio_file, speed):
+    loop = asyncio.get_running_loop()
+    texts, boundaries, offset = [], [], 0.0
+    with open(audio_file, "wb") as f:
+        while True:
+            text = await loop.run_in_executor(None, q.get)
+            if text is None: break
+            if isinstance(text, Exception): raise text
+            # MP3-Frames lassen sich direkt aneinanderhängen
+            offset += await _write_stream(f, text, voice, speed, boundaries, offset) / MP3_BYTES_PER_SEC
+            texts.append(text)
+    return texts, boundaries
+
+def synthesize_stream(chunks, voice, audio_file, speed=1.0):
+    # chunks: Iterator von Textstücken (z.B. Sätze direkt aus dem LLM-Stream). Ein Thread liest den
+    # Iterator leer, während hier schon das vorige Stück gesprochen wird -> LLM und TTS überlappen.
+    # Gibt (gesprochene Stücke, Wortgrenzen über die ganze Datei) zurück.
+    q = queue.Queue()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for text in chunks:
+                # TTS ist schon gescheitert: LLM-Stream abbrechen statt ihn umsonst zu Ende zu lesen
+                if stop.is_set(): break
+                if text.strip(): q.put(text)
+        except Exception as e:
+            q.put(e)
+        finally:
+            q.put(None)
+            # Generator schließen -> die offene ollama-Anfrage wird beendet
+            if stop.is_set() and hasattr(chunks, "close"): chunks.close()
+
+    threading.Thread(target=produce, name="llm-stream", daemon=True).start()
+    try:
+        return asyncio.run(_synthesize_queue(q, voice, audio_file, speed))
+    finally:
+        stop.set()